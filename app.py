@@ -1,17 +1,34 @@
-from fastapi import FastAPI, BackgroundTasks, Depends, Query, HTTPException
+from fastapi import FastAPI, BackgroundTasks, Depends, Query, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import Base, Movie_Info, Production_Info, Rating_Info, EtlMetadata
-from database import engine, get_db
+from database import engine, async_engine, get_db, get_async_db
 from mongodb_database import connect_to_mongo, close_mongo_connection, get_mongo_database
-from scripts.etl import run_etl
+from scripts.etl import run_etl, ETL_EXPORT_RAW
+from scripts.export import export_raw_artifacts
 from scripts.mongo_etl import run_mongo_etl
-from scripts.services.movie_service import MovieService
+from scripts.mongo_load import MONGO_LOAD_MODE
+from scripts.mongo_sync import sync_postgres_to_mongo_async, MONGO_SYNC_BATCH_SIZE
+from scripts.mongo_indexes import reconcile_indexes_async, check_index_coverage_async
+from scripts.mongo_search import build_search_filter, backfill_title_keys_async, MONGO_SEARCH_COUNT_LIMIT
+from scripts.pagination import mongo_page_async
+from scripts.mongo_aggregations import (
+    STATS_PIPELINE, AGGREGATIONS_PIPELINE, run_facet_async, format_stats, format_aggregations
+)
+from scripts.pg_indexes import ensure_trigram_indexes, ensure_model_indexes, ensure_change_tracking
+from scripts.bridges import ensure_bridges, ensure_list_arrays
+from scripts.aggregates import ensure_materialized_views
+from scripts.rollups import ensure_rollups
+from scripts.services.movie_service import AsyncMovieService
 from typing import Optional, List, Dict, Any
 from contextlib import asynccontextmanager
-from scripts.services.production_service import ProductionService
-from scripts.services.rating_service import RatingService
-import json
+from scripts.services.production_service import AsyncProductionService
+from scripts.services.rating_service import AsyncRatingService
+from scripts.services.dashboard_service import DashboardService
+from scripts.services.cache import service_cache, bump_data_version
+from scripts.http_cache import is_conditional, current_data_version, build_validators, not_modified
 import time
 from datetime import datetime
 
@@ -19,10 +36,56 @@ from datetime import datetime
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    try:
+        ensure_model_indexes(engine, Movie_Info)
+    except Exception as e:
+        print(f"movie_info index setup skipped: {str(e)}")
+    try:
+        for model in (Movie_Info, Production_Info, Rating_Info):
+            ensure_change_tracking(engine, model)
+    except Exception as e:
+        print(f"Change tracking setup skipped: {str(e)}")
+    try:
+        print(f"pg_trgm title search enabled: {ensure_trigram_indexes(engine)}")
+    except Exception as e:
+        print(f"pg_trgm setup skipped: {str(e)}")
+    try:
+        ensure_model_indexes(engine, Production_Info)
+        converted = ensure_list_arrays(engine)
+        if converted:
+            print(f"production_info lists converted to JSON arrays: {converted} rows")
+    except Exception as e:
+        print(f"production_info array setup skipped: {str(e)}")
+    try:
+        if ensure_bridges(engine):
+            print("People/country/language bridge tables backfilled")
+    except Exception as e:
+        print(f"Bridge table backfill skipped: {str(e)}")
+    try:
+        if ensure_rollups(engine):
+            print("Dashboard rollups backfilled")
+    except Exception as e:
+        print(f"Rollup backfill skipped: {str(e)}")
+    try:
+        ensure_materialized_views(engine)
+    except Exception as e:
+        print(f"Materialized view setup skipped: {str(e)}")
     await connect_to_mongo()
+    try:
+        indexes = await reconcile_indexes_async(get_mongo_database().movies)
+        print(f"MongoDB indexes created: {indexes['created']} | dropped: {indexes['dropped']}")
+    except Exception as e:
+        print(f"MongoDB index reconciliation skipped: {str(e)}")
+    try:
+        backfilled = await backfill_title_keys_async(get_mongo_database().movies)
+        if backfilled:
+            print(f"MongoDB title_lower added to {backfilled} documents")
+    except Exception as e:
+        print(f"MongoDB title_lower backfill skipped: {str(e)}")
     yield
     # Shutdown
     await close_mongo_connection()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Movie Database API - PostgreSQL + MongoDB", 
@@ -38,6 +101,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """Answer unchanged /api/* and /mongo/* reads with 304 before running any query"""
+    if not is_conditional(request.method, request.url.path):
+        return await call_next(request)
+    try:
+        version, updated_at = await run_in_threadpool(current_data_version, engine)
+    except Exception:
+        return await call_next(request)
+
+    validators = build_validators(version, updated_at, request.url.path, request.url.query, app.version)
+    if not_modified(request.headers, validators):
+        return Response(status_code=304, headers=validators)
+
+    response = await call_next(request)
+    # no-store marks an answer that must not be revalidated (e.g. a partial dashboard bundle)
+    if response.status_code == 200 and "no-store" not in response.headers.get("cache-control", ""):
+        response.headers.update(validators)
+    return response
+
 @app.get('/')
 def root():
     return {
@@ -51,11 +134,15 @@ def root():
                 "test_db": "/test-db",
                 "run_etl": "POST /run-etl",
                 "run_etl_async": "POST /run-etl-async",
-                "movies": "/movies",
+                "export_raw": "POST /export-raw",
+                "movies": "/api/movies",
+                "movies_legacy": "/movies (deprecated)",
                 "top_movies": "/api/movies/top-rated",
                 "movies_by_year": "/api/movies/by-year/{start_year}/{end_year}",
                 "statistics": "/api/movies/statistics",
-                "search": "/api/movies/search"
+                "search": "/api/movies/search",
+                "dashboard_bundle": "/api/dashboard/bundle",
+                "cache_stats": "/api/cache/stats"
             },
             "mongodb": {
                 "test_mongodb": "/test-mongodb",
@@ -64,6 +151,7 @@ def root():
                 "mongo_search": "/mongo/search",
                 "mongo_stats": "/mongo/stats",
                 "mongo_aggregations": "/mongo/aggregations",
+                "mongo_index_check": "/mongo/indexes/check",
                 "sync_to_mongo": "POST /mongo/sync"
             },
             "documentation": "/docs"
@@ -87,7 +175,12 @@ def test_database(db: Session = Depends(get_db)):
         return {'database': 'PostgreSQL', 'connected': False, 'error': str(e)}
 
 @app.post('/run-etl')
-def execute_etl():
+def execute_etl(
+    background_tasks: BackgroundTasks,
+    chunk_size: Optional[int] = Query(None, ge=1, description="Rows per chunk (streaming mode)"),
+    strategy: Optional[str] = Query(None, regex="^(watermark|fingerprint)$", description="Change detection"),
+    dry_run: bool = Query(False, description="Only report inserted/updated/deleted counts (fingerprint)")
+):
     try:
         print("\n" + "="*70)
         print("STARTING POSTGRESQL ETL PROCESS")
@@ -95,8 +188,13 @@ def execute_etl():
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         start_time = time.time()
-        run_etl()
+        # Raw CSV/JSON export runs after the response, off the load path
+        result = run_etl(chunksize=chunk_size, export_raw=False, strategy=strategy, dry_run=dry_run)
         total_time = time.time() - start_time
+        if dry_run:
+            return {'status': 'success', 'database': 'PostgreSQL', 'dry_run': True, 'changes': result}
+        if ETL_EXPORT_RAW:
+            background_tasks.add_task(export_raw_artifacts)
         
         print("\n" + "="*70)
         print("POSTGRESQL ETL COMPLETED")
@@ -114,26 +212,50 @@ def execute_etl():
         return {'status': 'error', 'message': str(e)}
 
 @app.post('/run-etl-async')
-def execute_etl_async(background_tasks: BackgroundTasks):
+def execute_etl_async(
+    background_tasks: BackgroundTasks,
+    chunk_size: Optional[int] = Query(None, ge=1, description="Rows per chunk (streaming mode)")
+):
     try:
         print("\n[BACKGROUND] Starting PostgreSQL ETL process...")
-        background_tasks.add_task(run_etl)
+        background_tasks.add_task(run_etl, chunk_size)
         return {'status': 'success', 'message': 'ETL process started in background'}
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
+@app.post('/export-raw')
+def execute_raw_export(
+    background_tasks: BackgroundTasks,
+    background: bool = Query(True, description="Run the export in background"),
+    compress: bool = Query(True, description="gzip the exported files")
+):
+    """
+    Export the source CSV to JSON Lines and back to CSV (raw/ artifacts)
+    """
+    try:
+        if background:
+            background_tasks.add_task(export_raw_artifacts, compress=compress)
+            return {'status': 'success', 'message': 'Raw export started in background'}
+        return {'status': 'success', **export_raw_artifacts(compress=compress)}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
 @app.post('/run-etl-mongo')
-def execute_mongo_etl():
+def execute_mongo_etl(
+    mode: Optional[str] = Query(None, regex="^(upsert|swap|replace)$", description="How documents are written")
+):
     """
     Execute ETL process to load data into MongoDB with timing metrics
     """
     try:
-        result = run_mongo_etl()
+        result = run_mongo_etl(mode=mode)
+        _bump_after_mongo_load()
         return {
             'status': result.get('status', 'unknown'),
             'database': 'MongoDB',
             'message': 'MongoDB ETL process completed',
             'records_loaded': result.get('records_loaded', 0),
+            'changes': result.get('changes'),
             'execution_time': f"{result.get('execution_time', 0):.2f} seconds"
         }
     except Exception as e:
@@ -144,51 +266,102 @@ def execute_mongo_etl():
             'message': str(e)
         }
 
-@app.get('/movies')
-def get_movies(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+def _bump_after_mongo_load():
+    """New MongoDB documents change the /mongo/* answers: invalidate their ETags"""
+    try:
+        bump_data_version(engine)
+    except Exception as e:
+        print(f"Data version bump failed: {str(e)}")
+
+# Headers of endpoints (or parameters) kept only for existing clients
+def deprecate(response: Response, successor: Optional[str] = None) -> None:
+    response.headers["Deprecation"] = "true"
+    if successor:
+        response.headers["Link"] = f'<{successor}>; rel="successor-version"'
+
+@app.get('/movies', deprecated=True)
+def get_movies_legacy(response: Response, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    """Deprecated: offset-paginated list of movies, use /api/movies"""
+    deprecate(response, "/api/movies")
     movies = db.query(Movie_Info).offset(skip).limit(limit).all()
     return movies
 
+@app.get('/api/movies')
+async def get_movies(
+    limit: int = Query(10, ge=1, le=100),
+    sort_by: str = Query("imdb_title_id", description="imdb_title_id, title, year or duration"),
+    order: str = Query("asc", description="asc or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Keyset-paginated movies from PostgreSQL"""
+    service = AsyncMovieService(db)
+    try:
+        page = await service.get_movies_page(sort_by=sort_by, order=order, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "total": await service.get_movie_count(),
+        "limit": limit,
+        **page
+    }
+
 @app.get("/api/movies/top-rated")
-def get_top_rated_movies(
+async def get_top_rated_movies(
     limit: int = Query(default=10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    actor: Optional[str] = Query(None, description="Exact actor name"),
+    director: Optional[str] = Query(None, description="Exact director name"),
+    country: Optional[str] = Query(None, description="Exact country name"),
+    language: Optional[str] = Query(None, description="Exact language name"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get top rated movies from PostgreSQL"""
-    service = MovieService(db)
-    return service.get_top_movies_by_rating(limit)
+    service = AsyncMovieService(db)
+    return await service.get_top_movies_by_rating(
+        limit, actor=actor, director=director, country=country, language=language
+    )
 
 @app.get("/api/movies/by-year/{start_year}/{end_year}")
-def get_movies_by_year_range(
+async def get_movies_by_year_range(
     start_year: int,
     end_year: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get movies by year range from PostgreSQL"""
-    service = MovieService(db)
-    return service.get_movies_by_year_range(start_year, end_year)
+    service = AsyncMovieService(db)
+    return await service.get_movies_by_year_range(start_year, end_year)
 
 @app.get("/api/movies/statistics")
-def get_movie_statistics(db: Session = Depends(get_db)):
+async def get_movie_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get statistics from PostgreSQL"""
-    service = MovieService(db)
-    return service.get_movie_statistics()
+    service = AsyncMovieService(db)
+    return await service.get_movie_statistics()
 
 @app.get("/api/movies/search")
-def search_movies(
+async def search_movies(
     title: Optional[str] = Query(None, description="Movie title"),
     min_year: Optional[int] = Query(None, description="Minimum year"),
     max_year: Optional[int] = Query(None, description="Maximum year"),
     min_rating: Optional[float] = Query(None, ge=0, le=10, description="Minimum rating"),
-    db: Session = Depends(get_db)
+    fuzzy: bool = Query(False, description="Typo-tolerant title match (requires pg_trgm)"),
+    actor: Optional[str] = Query(None, description="Exact actor name"),
+    director: Optional[str] = Query(None, description="Exact director name"),
+    country: Optional[str] = Query(None, description="Exact country name"),
+    language: Optional[str] = Query(None, description="Exact language name"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Advanced search in PostgreSQL"""
-    service = MovieService(db)
-    return service.search_movies_advanced(
+    service = AsyncMovieService(db)
+    return await service.search_movies_advanced(
         title=title,
         min_year=min_year,
         max_year=max_year,
-        min_rating=min_rating
+        min_rating=min_rating,
+        fuzzy=fuzzy,
+        actor=actor,
+        director=director,
+        country=country,
+        language=language
     )
 
 # ============= MongoDB Endpoints =============
@@ -215,255 +388,146 @@ async def test_mongodb():
 
 @app.get('/mongo/movies')
 async def get_mongo_movies(
-    skip: int = Query(0, ge=0),
+    response: Response,
     limit: int = Query(10, ge=1, le=100),
-    sort_by: str = Query("year", description="Field to sort by"),
-    order: str = Query("desc", description="asc or desc")
+    sort_by: str = Query("year", description="imdb_title_id, title, year, avg_vote, votes or duration"),
+    order: str = Query("desc", description="asc or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Deprecated offset paging, use cursor")
 ):
-    """Get movies from MongoDB"""
+    """Keyset-paginated movies from MongoDB"""
     db = get_mongo_database()
     
-    sort_order = -1 if order == "desc" else 1
-    
-    cursor = db.movies.find().sort(sort_by, sort_order).skip(skip).limit(limit)
-    movies = []
+    if skip is not None:
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="Use either cursor or the deprecated skip")
+        # Previous offset paging, kept for existing clients
+        deprecate(response)
+        sort_order = -1 if order == "desc" else 1
+        movies = []
+        async for movie in db.movies.find().sort(sort_by, sort_order).skip(skip).limit(limit):
+            movie["_id"] = str(movie["_id"])
+            movies.append(movie)
+        return {
+            "total": await db.movies.count_documents({}),
+            "skip": skip,
+            "limit": limit,
+            "data": movies
+        }
     
-    async for movie in cursor:
-        movie["_id"] = str(movie["_id"])
-        movies.append(movie)
+    try:
+        page = await mongo_page_async(db.movies, sort_by, order, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    total = await db.movies.count_documents({})
+    # Collection metadata count: O(1), exact unless a shutdown was unclean
+    total = await db.movies.estimated_document_count()
     
     return {
         "total": total,
-        "skip": skip,
         "limit": limit,
-        "data": movies
+        **page
     }
 
 @app.get('/mongo/search')
 async def search_mongo_movies(
     q: str = Query(None, description="Search query"),
+    mode: str = Query("text", regex="^(text|regex)$", description="text: ranked text index search, regex: unindexed substring match"),
     title: Optional[str] = Query(None, description="Title filter"),
     director: Optional[str] = Query(None, description="Director filter"),
     country: Optional[str] = Query(None, description="Country filter"),
     min_year: Optional[int] = Query(None, description="Minimum year"),
     max_year: Optional[int] = Query(None, description="Maximum year"),
     min_rating: Optional[float] = Query(None, ge=0, le=10),
+    skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100)
 ):
     """Search movies in MongoDB with multiple filters"""
     db = get_mongo_database()
     
-    # Build query
-    query_filter = {}
-    
-    if q:
-        # General text search
-        query_filter["$or"] = [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"description": {"$regex": q, "$options": "i"}},
-            {"director": {"$regex": q, "$options": "i"}}
-        ]
-    
-    if title:
-        query_filter["title"] = {"$regex": title, "$options": "i"}
-    
-    if director:
-        query_filter["director"] = {"$regex": director, "$options": "i"}
-    
-    if country:
-        query_filter["country"] = {"$regex": country, "$options": "i"}
-    
-    if min_year or max_year:
-        year_filter = {}
-        if min_year:
-            year_filter["$gte"] = min_year
-        if max_year:
-            year_filter["$lte"] = max_year
-        query_filter["year"] = year_filter
-    
-    if min_rating:
-        query_filter["avg_vote"] = {"$gte": min_rating}
+    search = build_search_filter(
+        q=q, mode=mode, title=title, director=director, country=country,
+        min_year=min_year, max_year=max_year, min_rating=min_rating
+    )
+    query_filter = search["filter"]
     
-    cursor = db.movies.find(query_filter).limit(limit)
+    cursor = db.movies.find(query_filter, search["projection"])
+    if search["sort"]:
+        cursor = cursor.sort(search["sort"])
+    cursor = cursor.skip(skip).limit(limit)
     results = []
     
     async for movie in cursor:
         movie["_id"] = str(movie["_id"])
         results.append(movie)
     
+    # Counting every match would cost a full scan per keystroke: stop at the cap
+    total = await db.movies.count_documents(query_filter, limit=MONGO_SEARCH_COUNT_LIMIT)
+    
     return {
         "query": query_filter,
+        "strategy": search["strategy"],
+        "total": total,
+        "total_capped": total >= MONGO_SEARCH_COUNT_LIMIT,
+        "skip": skip,
+        "limit": limit,
         "count": len(results),
         "results": results
     }
 
 @app.get('/mongo/stats')
 async def get_mongo_stats():
-    """Get aggregated statistics from MongoDB"""
+    """Get aggregated statistics from MongoDB (one $facet pass over the collection)"""
     db = get_mongo_database()
-    
-    # Total movies
-    total_movies = await db.movies.count_documents({})
-    
-    # Movies by year
-    year_pipeline = [
-        {"$match": {"year": {"$ne": None}}},
-        {"$group": {"_id": "$year", "count": {"$sum": 1}}},
-        {"$sort": {"_id": -1}},
-        {"$limit": 10}
-    ]
-    
-    year_stats = []
-    async for doc in db.movies.aggregate(year_pipeline):
-        year_stats.append({"year": doc["_id"], "count": doc["count"]})
-    
-    # Top rated movies
-    top_rated_pipeline = [
-        {"$match": {"avg_vote": {"$ne": None}}},
-        {"$sort": {"avg_vote": -1}},
-        {"$limit": 10},
-        {"$project": {"title": 1, "year": 1, "avg_vote": 1, "_id": 0}}
-    ]
-    
-    top_rated = []
-    async for doc in db.movies.aggregate(top_rated_pipeline):
-        top_rated.append(doc)
-    
-    # Average rating
-    avg_rating_pipeline = [
-        {"$match": {"avg_vote": {"$ne": None}}},
-        {"$group": {"_id": None, "avg_rating": {"$avg": "$avg_vote"}}}
-    ]
-    
-    avg_rating_cursor = db.movies.aggregate(avg_rating_pipeline)
-    avg_rating_result = await avg_rating_cursor.next()
-    avg_rating = avg_rating_result["avg_rating"] if avg_rating_result else 0
-    
-    return {
-        "total_movies": total_movies,
-        "average_rating": round(avg_rating, 2),
-        "movies_by_year": year_stats,
-        "top_rated_movies": top_rated
-    }
+    facets = await run_facet_async(db.movies, STATS_PIPELINE)
+    return format_stats(facets)
 
 @app.get('/mongo/aggregations')
 async def get_mongo_aggregations():
-    """Complex aggregations from MongoDB"""
+    """Complex aggregations from MongoDB (one $facet pass over the collection)"""
     db = get_mongo_database()
-    
-    # Directors with most movies
-    directors_pipeline = [
-        {"$match": {"director": {"$ne": None}}},
-        {"$group": {"_id": "$director", "movie_count": {"$sum": 1}, "avg_rating": {"$avg": "$avg_vote"}}},
-        {"$sort": {"movie_count": -1}},
-        {"$limit": 10}
-    ]
-    
-    directors = []
-    async for doc in db.movies.aggregate(directors_pipeline):
-        director_name = doc["_id"]
-        if director_name.startswith('"') or director_name.startswith('['):
-            try:
-                director_name = json.loads(director_name)
-                if isinstance(director_name, list):
-                    director_name = ", ".join(director_name)
-            except:
-                pass
-        
-        directors.append({
-            "director": director_name,
-            "movie_count": doc["movie_count"],
-            "avg_rating": round(doc["avg_rating"], 2) if doc["avg_rating"] else None
-        })
-    
-    # Movies by duration range
-    duration_pipeline = [
-        {"$match": {"duration": {"$ne": None}}},
-        {"$bucket": {
-            "groupBy": "$duration",
-            "boundaries": [0, 60, 90, 120, 150, 180, 300],
-            "default": "300+",
-            "output": {
-                "count": {"$sum": 1},
-                "titles": {"$push": "$title"}
-            }
-        }}
-    ]
-    
-    duration_ranges = []
-    async for doc in db.movies.aggregate(duration_pipeline):
-        range_label = f"{doc['_id']}-{doc['_id']+30} min" if doc['_id'] != "300+" else "300+ min"
-        duration_ranges.append({
-            "range": range_label,
-            "count": doc["count"],
-            "sample_titles": doc["titles"][:3]
-        })
-    
+    facets = await run_facet_async(db.movies, AGGREGATIONS_PIPELINE)
+    return format_aggregations(facets)
+
+@app.get('/mongo/indexes/check')
+async def check_mongo_indexes():
+    """Explain every /mongo/* query and report whether it is served by an index"""
+    db = get_mongo_database()
+    try:
+        coverage = await check_index_coverage_async(db.movies)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index check failed: {str(e)}")
     return {
-        "top_directors": directors,
-        "movies_by_duration": duration_ranges
+        "all_covered": all(entry["covered"] for entry in coverage.values()),
+        "queries": coverage
     }
 
 @app.post('/mongo/sync')
-async def sync_postgres_to_mongo(db: Session = Depends(get_db)):
-    """Sync data from PostgreSQL to MongoDB"""
+async def sync_postgres_to_mongo(
+    mode: Optional[str] = Query(None, regex="^(upsert|swap|replace)$", description="How documents are written"),
+    batch_size: Optional[int] = Query(None, ge=100, le=50000, description="Rows per cursor fetch and MongoDB write"),
+    incremental: bool = Query(False, description="Only ship rows changed since the last sync (upsert mode)")
+):
+    """Stream PostgreSQL movies to MongoDB in batches (constant memory)"""
+    if incremental and mode not in (None, "upsert"):
+        raise HTTPException(status_code=400, detail="incremental sync only supports mode=upsert")
     try:
         mongo_db = get_mongo_database()
         
-        # Get all movies from PostgreSQL
-        movies = db.query(Movie_Info).all()
-        productions = db.query(Production_Info).all()
-        ratings = db.query(Rating_Info).all()
-        
-        # Create lookup dictionaries
-        prod_dict = {p.imdb_title_id: p for p in productions}
-        rating_dict = {r.imdb_title_id: r for r in ratings}
-        
-        # Prepare documents for MongoDB
-        documents = []
-        for movie in movies:
-            doc = {
-                "imdb_title_id": movie.imdb_title_id,
-                "title": movie.title,
-                "year": movie.year,
-                "duration": movie.duration,
-                "description": movie.description
-            }
-            
-            # Add production info
-            if movie.imdb_title_id in prod_dict:
-                prod = prod_dict[movie.imdb_title_id]
-                doc.update({
-                    "director": prod.director,
-                    "writer": prod.writer,
-                    "production_company": prod.production_company,
-                    "actors": prod.actors,
-                    "country": prod.country,
-                    "language": prod.language
-                })
-            
-            # Add rating info
-            if movie.imdb_title_id in rating_dict:
-                rating = rating_dict[movie.imdb_title_id]
-                doc.update({
-                    "avg_vote": rating.avg_vote,
-                    "votes": rating.votes,
-                    "reviews_from_users": rating.reviews_from_users,
-                    "reviews_from_critics": rating.reviews_from_critics
-                })
-            
-            documents.append(doc)
-        
-        # Clear existing data and insert new
-        await mongo_db.movies.delete_many({})
-        if documents:
-            await mongo_db.movies.insert_many(documents)
+        # Upsert or shadow-swap so readers never see a partial collection
+        result = await sync_postgres_to_mongo_async(
+            mongo_db, async_engine,
+            mode="upsert" if incremental else mode or MONGO_LOAD_MODE,
+            batch_size=batch_size or MONGO_SYNC_BATCH_SIZE,
+            incremental=incremental
+        )
+        _bump_after_mongo_load()
+        synced = result["inserted"] + result["updated"] + result["unchanged"]
         
         return {
             "status": "success",
-            "message": f"Synced {len(documents)} movies from PostgreSQL to MongoDB"
+            "message": f"Synced {synced} movies from PostgreSQL to MongoDB",
+            "changes": result
         }
         
     except Exception as e:
@@ -475,94 +539,94 @@ async def sync_postgres_to_mongo(db: Session = Depends(get_db)):
 # =====================================
 
 @app.get("/api/production/companies")
-def get_production_companies(
+async def get_production_companies(
     limit: int = Query(default=10, ge=1, le=100),
     min_movies: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top production companies with statistics.
     Perfect for: Bar charts, company rankings
     """
-    service = ProductionService(db)
-    return service.get_top_production_companies(limit=limit, min_movies=min_movies)
+    service = AsyncProductionService(db)
+    return await service.get_top_production_companies(limit=limit, min_movies=min_movies)
 
 @app.get("/api/production/countries")
-def get_movies_by_country(
+async def get_movies_by_country(
     top_n: int = Query(default=20, ge=1, le=100),
     year_from: Optional[int] = Query(None, ge=1900, le=2030),
     year_to: Optional[int] = Query(None, ge=1900, le=2030),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get movie distribution by country with filtering.
     Perfect for: World maps, country comparisons
     """
-    service = ProductionService(db)
-    return service.get_movies_by_country(
+    service = AsyncProductionService(db)
+    return await service.get_movies_by_country(
         top_n=top_n,
         year_from=year_from,
         year_to=year_to
     )
 
 @app.get("/api/production/directors")
-def get_top_directors(
+async def get_top_directors(
     limit: int = Query(default=15, ge=1, le=100),
     min_movies: int = Query(default=2, ge=1),
     sort_by: str = Query(default="movie_count", regex="^(movie_count|avg_rating|total_votes)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top directors with their statistics.
     Sort options: movie_count, avg_rating, total_votes
     Perfect for: Director rankings, talent analysis
     """
-    service = ProductionService(db)
-    return service.get_top_directors(
+    service = AsyncProductionService(db)
+    return await service.get_top_directors(
         limit=limit,
         min_movies=min_movies,
         sort_by=sort_by
     )
 
 @app.get("/api/production/languages")
-def get_language_distribution(
+async def get_language_distribution(
     limit: int = Query(default=10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get movie distribution by language.
     Perfect for: Language diversity charts, pie charts
     """
-    service = ProductionService(db)
-    return service.get_language_distribution(limit=limit)
+    service = AsyncProductionService(db)
+    return await service.get_language_distribution(limit=limit)
 
 @app.get("/api/production/actors")
-def get_top_actors(
+async def get_top_actors(
     limit: int = Query(default=20, ge=1, le=100),
     min_movies: int = Query(default=3, ge=1),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top actors by appearances and ratings.
     Perfect for: Star power analysis, actor rankings
     """
-    service = ProductionService(db)
-    return service.get_top_actors(
+    service = AsyncProductionService(db)
+    return await service.get_top_actors(
         limit=limit,
         min_movies=min_movies
     )
 
 @app.get("/api/production/writers")
-def get_top_writers(
+async def get_top_writers(
     limit: int = Query(default=15, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top writers with their statistics.
     Perfect for: Writer rankings, screenplay quality analysis
     """
-    service = ProductionService(db)
-    return service.get_top_writers(limit=limit)
+    service = AsyncProductionService(db)
+    return await service.get_top_writers(limit=limit)
 
 
 # =====================================
@@ -570,107 +634,151 @@ def get_top_writers(
 # =====================================
 
 @app.get("/api/ratings/distribution")
-def get_rating_distribution(
+async def get_rating_distribution(
     bins: int = Query(default=10, ge=5, le=20),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get rating distribution across all movies.
     Perfect for: Histogram charts, rating analysis
     """
-    service = RatingService(db)
-    return service.get_rating_distribution(bins=bins)
+    service = AsyncRatingService(db)
+    return await service.get_rating_distribution(bins=bins)
 
 @app.get("/api/ratings/top-rated")
-def get_top_rated_movies_endpoint(
+async def get_top_rated_movies_endpoint(
     limit: int = Query(default=20, ge=1, le=100),
     min_votes: int = Query(default=1000, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get top rated movies with minimum vote threshold.
     Perfect for: Top movie lists, quality rankings
     """
-    service = RatingService(db)
-    return service.get_top_rated_movies(limit=limit, min_votes=min_votes)
+    service = AsyncRatingService(db)
+    return await service.get_top_rated_movies(limit=limit, min_votes=min_votes)
 
 @app.get("/api/ratings/most-voted")
-def get_most_voted_movies_endpoint(
+async def get_most_voted_movies_endpoint(
     limit: int = Query(default=20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get most voted movies (popularity).
     Perfect for: Popular movie lists, engagement metrics
     """
-    service = RatingService(db)
-    return service.get_most_voted_movies(limit=limit)
+    service = AsyncRatingService(db)
+    return await service.get_most_voted_movies(limit=limit)
 
 @app.get("/api/ratings/trends")
-def get_rating_trends(
+async def get_rating_trends(
     start_year: Optional[int] = Query(None, ge=1900, le=2030),
     end_year: Optional[int] = Query(None, ge=1900, le=2030),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get rating trends by year.
     Perfect for: Time series charts, trend analysis
     """
-    service = RatingService(db)
-    return service.get_rating_trends_by_year(start_year=start_year, end_year=end_year)
+    service = AsyncRatingService(db)
+    return await service.get_rating_trends_by_year(start_year=start_year, end_year=end_year)
 
 @app.get("/api/ratings/controversial")
-def get_controversial_movies_endpoint(
+async def get_controversial_movies_endpoint(
     limit: int = Query(default=20, ge=1, le=100),
     min_votes: int = Query(default=500, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get movies with biggest gap between user and critic reviews.
     Perfect for: Controversy analysis, critic vs audience comparison
     """
-    service = RatingService(db)
-    return service.get_controversial_movies(limit=limit, min_votes=min_votes)
+    service = AsyncRatingService(db)
+    return await service.get_controversial_movies(limit=limit, min_votes=min_votes)
 
 @app.get("/api/ratings/duration-analysis")
-def get_rating_duration_analysis(db: Session = Depends(get_db)):
+async def get_rating_duration_analysis(db: AsyncSession = Depends(get_async_db)):
     """
     Analyze ratings by movie duration categories.
     Perfect for: Duration impact analysis, optimal length insights
     """
-    service = RatingService(db)
-    return service.get_rating_vs_duration_analysis()
+    service = AsyncRatingService(db)
+    return await service.get_rating_vs_duration_analysis()
 
 @app.get("/api/ratings/underrated")
-def get_underrated_movies_endpoint(
+async def get_underrated_movies_endpoint(
     limit: int = Query(default=20, ge=1, le=100),
     max_votes: int = Query(default=10000, ge=100),
     min_rating: float = Query(default=7.0, ge=0, le=10),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get hidden gems - high rated movies with few votes.
     Perfect for: Discovery features, hidden gem recommendations
     """
-    service = RatingService(db)
-    return service.get_underrated_movies(
+    service = AsyncRatingService(db)
+    return await service.get_underrated_movies(
         limit=limit,
         max_votes=max_votes,
         min_rating=min_rating
     )
 
 @app.get("/api/ratings/statistics")
-def get_rating_statistics_endpoint(db: Session = Depends(get_db)):
+async def get_rating_statistics_endpoint(db: AsyncSession = Depends(get_async_db)):
     """
     Get comprehensive rating statistics.
     Perfect for: Dashboard KPIs, overall metrics
     """
-    service = RatingService(db)
-    return service.get_rating_statistics()
-
-
-
-
-
-
-
+    service = AsyncRatingService(db)
+    return await service.get_rating_statistics()
+
+@app.get("/api/dashboard/bundle")
+async def get_dashboard_bundle(
+    response: Response,
+    charts: Optional[str] = Query(None, description="Comma-separated charts (default: all)"),
+    company_limit: int = Query(default=10, ge=1, le=100),
+    company_min_movies: int = Query(default=0, ge=0),
+    distribution_bins: int = Query(default=10, ge=5, le=20),
+    country_top: int = Query(default=20, ge=1, le=100),
+    year_from: Optional[int] = Query(None, ge=1900, le=2030),
+    year_to: Optional[int] = Query(None, ge=1900, le=2030),
+    trend_start: Optional[int] = Query(None, ge=1900, le=2030),
+    trend_end: Optional[int] = Query(None, ge=1900, le=2030),
+    language_limit: int = Query(default=10, ge=1, le=50),
+    director_limit: int = Query(default=15, ge=1, le=100),
+    director_min_movies: int = Query(default=2, ge=1),
+    director_sort: str = Query(default="movie_count", regex="^(movie_count|avg_rating|total_votes)$"),
+    top_limit: int = Query(default=20, ge=1, le=100),
+    min_votes: int = Query(default=1000, ge=0)
+):
+    """
+    Every dashboard chart in one response, queried concurrently on pooled connections.
+    Charts: statistics, companies, distribution, countries, trends, languages,
+    directors, duration, top_rated. Filters default like the single-chart endpoints.
+    Perfect for: Dashboard first paint, bounded by the slowest chart
+    """
+    filters = {
+        "company_limit": company_limit, "company_min_movies": company_min_movies,
+        "distribution_bins": distribution_bins, "country_top": country_top,
+        "year_from": year_from, "year_to": year_to,
+        "trend_start": trend_start, "trend_end": trend_end,
+        "language_limit": language_limit, "director_limit": director_limit,
+        "director_min_movies": director_min_movies, "director_sort": director_sort,
+        "top_limit": top_limit, "min_votes": min_votes
+    }
+    requested = [chart.strip() for chart in charts.split(",") if chart.strip()] if charts else None
+    try:
+        bundle = await DashboardService().get_bundle(requested, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if bundle["errors"]:
+        # A partial bundle must not get validators: a later 304 would pin the missing charts
+        response.headers["Cache-Control"] = "no-store"
+    return bundle
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """
+    Hit/miss counters of the service result cache and the data version it serves.
+    """
+    return service_cache.stats()
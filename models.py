@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, func, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, ForeignKey, func, DateTime, Index
 from database import Base
 from typing import Optional
 from sqlalchemy.orm import relationship
@@ -8,13 +8,21 @@ from datetime import datetime
 
 class Movie_Info(Base):
     __tablename__ = "movie_info"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Keyset pagination of /movies: ORDER BY <sort key>, imdb_title_id
+        Index("ix_movie_info_title_id", "title", "imdb_title_id"),
+        Index("ix_movie_info_year_id", "year", "imdb_title_id"),
+        Index("ix_movie_info_duration_id", "duration", "imdb_title_id"),
+        {'extend_existing': True},
+    )
 
     imdb_title_id = Column(String(10), primary_key=True, index=True)
     title = Column(String(250), index=True, nullable=False)
     year = Column(Integer, index=True, nullable=True)
     duration = Column(Integer, index=True, nullable=True)
     description = Column(String(500), index=True, nullable=True)
+    # Stamped by the loader on insert and on real changes; drives the incremental MongoDB sync
+    updated_at = Column(DateTime, server_default=func.timezone("utc", func.now()), index=True, nullable=False)
 
     # Relationships
     production_info = relationship("Production_Info", back_populates="movie_info")
@@ -22,7 +30,14 @@ class Movie_Info(Base):
 
 class Production_Info(Base):
     __tablename__ = "production_info"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Containment filters of the movie endpoints: actors @> '["Name"]'
+        Index("ix_production_info_director_gin", "director", postgresql_using="gin", postgresql_ops={"director": "jsonb_path_ops"}),
+        Index("ix_production_info_actors_gin", "actors", postgresql_using="gin", postgresql_ops={"actors": "jsonb_path_ops"}),
+        Index("ix_production_info_country_gin", "country", postgresql_using="gin", postgresql_ops={"country": "jsonb_path_ops"}),
+        Index("ix_production_info_language_gin", "language", postgresql_using="gin", postgresql_ops={"language": "jsonb_path_ops"}),
+        {'extend_existing': True},
+    )
 
     imdb_title_id = Column(String(10), ForeignKey("movie_info.imdb_title_id"), primary_key=True, index=True)
     director = Column(JSONB,  index=True, nullable=False)
@@ -31,6 +46,7 @@ class Production_Info(Base):
     actors = Column(JSONB, index=True, nullable=False)
     country = Column(JSONB, nullable=True)
     language = Column(JSONB, index=True, nullable=True)
+    updated_at = Column(DateTime, server_default=func.timezone("utc", func.now()), index=True, nullable=False)
 
     # Relationship
     movie_info = relationship("Movie_Info", back_populates="production_info")
@@ -45,6 +61,7 @@ class Rating_Info(Base):
     votes = Column(Integer, index=True, nullable=False)
     reviews_from_users = Column(Integer, index=True, nullable=False)
     reviews_from_critics = Column(Integer, index=True, nullable=False)
+    updated_at = Column(DateTime, server_default=func.timezone("utc", func.now()), index=True, nullable=False)
     
     
 
@@ -58,3 +75,103 @@ class EtlMetadata(Base):
     key = Column(String, unique=True, nullable=False) 
     value = Column(String, nullable=False)             
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class RowFingerprint(Base):
+    __tablename__ = "etl_row_fingerprint"
+
+    imdb_title_id = Column(String(10), primary_key=True)
+    fingerprint = Column(String(16), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Dimension and bridge tables exploded from the comma-separated production_info
+# lists by the ETL (scripts/bridges.py), one row per movie and name
+
+class Person(Base):
+    __tablename__ = "person"
+
+    person_id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(250), unique=True, nullable=False)
+
+class Country(Base):
+    __tablename__ = "country"
+
+    country_id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+class Language(Base):
+    __tablename__ = "language"
+
+    language_id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+class MoviePerson(Base):
+    __tablename__ = "movie_person"
+    __table_args__ = (
+        # Per-person aggregates: WHERE role = ... GROUP BY person_id
+        Index("ix_movie_person_role_person", "role", "person_id"),
+    )
+
+    imdb_title_id = Column(String(10), ForeignKey("movie_info.imdb_title_id"), primary_key=True)
+    role = Column(String(10), primary_key=True)  # director, writer or actor
+    person_id = Column(Integer, ForeignKey("person.person_id"), primary_key=True)
+    ordinal = Column(Integer, nullable=False)  # position in the credits list
+
+class MovieCountry(Base):
+    __tablename__ = "movie_country"
+
+    imdb_title_id = Column(String(10), ForeignKey("movie_info.imdb_title_id"), primary_key=True)
+    country_id = Column(Integer, ForeignKey("country.country_id"), primary_key=True, index=True)
+    ordinal = Column(Integer, nullable=False)
+
+class MovieLanguage(Base):
+    __tablename__ = "movie_language"
+
+    imdb_title_id = Column(String(10), ForeignKey("movie_info.imdb_title_id"), primary_key=True)
+    language_id = Column(Integer, ForeignKey("language.language_id"), primary_key=True, index=True)
+    ordinal = Column(Integer, nullable=False)
+
+# Rollups kept current by the ETL from the delta rows of each load
+# (scripts/rollups.py). Ratings are kept in integer tenths (IMDb ratings have
+# one decimal): sums stay exact and, keyed per year, best/worst ratings
+# survive updates and removals.
+
+class RollupRatingBucket(Base):
+    __tablename__ = "rollup_rating_bucket"
+
+    rating10 = Column(Integer, primary_key=True)
+    movie_count = Column(Integer, nullable=False, default=0)
+    votes_sum = Column(BigInteger, nullable=False, default=0)
+    user_reviews_sum = Column(BigInteger, nullable=False, default=0)
+    critic_reviews_sum = Column(BigInteger, nullable=False, default=0)
+
+class RollupYear(Base):
+    __tablename__ = "rollup_year"
+
+    year = Column(Integer, primary_key=True)
+    rating10 = Column(Integer, primary_key=True)
+    movie_count = Column(Integer, nullable=False, default=0)
+    votes_sum = Column(BigInteger, nullable=False, default=0)
+    user_reviews_sum = Column(BigInteger, nullable=False, default=0)
+    critic_reviews_sum = Column(BigInteger, nullable=False, default=0)
+
+class RollupDuration(Base):
+    __tablename__ = "rollup_duration"
+
+    sort_order = Column(Integer, primary_key=True)
+    duration_category = Column(String(30), nullable=False)
+    movie_count = Column(Integer, nullable=False, default=0)
+    rating10_sum = Column(BigInteger, nullable=False, default=0)
+    votes_sum = Column(BigInteger, nullable=False, default=0)
+    duration_sum = Column(BigInteger, nullable=False, default=0)
+
+class RollupCompanyYear(Base):
+    __tablename__ = "rollup_company_year"
+
+    production_company = Column(String(150), primary_key=True)
+    year = Column(Integer, primary_key=True)  # 0 when unknown
+    movie_count = Column(Integer, nullable=False, default=0)
+    rating10_sum = Column(BigInteger, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    votes_sum = Column(BigInteger, nullable=False, default=0)
+    duration_sum = Column(BigInteger, nullable=False, default=0)
+    duration_count = Column(Integer, nullable=False, default=0)
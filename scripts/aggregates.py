@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+from sqlalchemy import text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Materialized aggregates read by RatingService and ProductionService: percentiles,
+# distinct counts and the per-person/country/language stats. Year, rating bucket,
+# duration and company rollups are kept current from deltas by scripts/rollups.py.
+# Each one is refreshed CONCURRENTLY after an ETL load commits, which needs
+# a unique index covering every row: (name, definition, unique index columns)
+MATERIALIZED_VIEWS = [
+    ("mv_rating_statistics", """
+        SELECT
+            1 as id,
+            COUNT(*) as total_movies,
+            AVG(avg_vote) as overall_avg_rating,
+            MAX(avg_vote) as highest_rating,
+            MIN(avg_vote) as lowest_rating,
+            STDDEV(avg_vote) as rating_std_dev,
+            SUM(votes) as total_votes,
+            AVG(votes) as avg_votes_per_movie,
+            MAX(votes) as max_votes,
+            MIN(votes) as min_votes,
+            SUM(reviews_from_users) as total_user_reviews,
+            SUM(reviews_from_critics) as total_critic_reviews,
+            AVG(reviews_from_users) as avg_user_reviews,
+            AVG(reviews_from_critics) as avg_critic_reviews,
+            PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY avg_vote) as median_rating,
+            PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY avg_vote) as q1_rating,
+            PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY avg_vote) as q3_rating
+        FROM rating_info
+        WHERE avg_vote IS NOT NULL
+    """, "id"),
+    # Kept per year so /api/production/countries can still filter by year range
+    ("mv_country_year", """
+        SELECT
+            c.country_id,
+            c.name as country,
+            m.year,
+            COUNT(*) as movie_count,
+            SUM(r.avg_vote) as rating_sum,
+            COUNT(r.avg_vote) as rating_count,
+            SUM(m.duration) as duration_sum,
+            COUNT(m.duration) as duration_count,
+            COUNT(*) FILTER (WHERE r.avg_vote >= 7.0) as high_rated_count
+        FROM movie_country mc
+        INNER JOIN country c ON mc.country_id = c.country_id
+        INNER JOIN movie_info m ON mc.imdb_title_id = m.imdb_title_id
+        LEFT JOIN rating_info r ON mc.imdb_title_id = r.imdb_title_id
+        GROUP BY c.country_id, c.name, m.year
+    """, "country_id, year"),
+    ("mv_person_stats", """
+        SELECT
+            mp.role,
+            pe.person_id,
+            pe.name,
+            COUNT(*) as movie_count,
+            AVG(r.avg_vote) as avg_rating,
+            SUM(r.votes) as total_votes,
+            MAX(r.avg_vote) as best_rating,
+            MIN(m.year) as first_movie,
+            MAX(m.year) as last_movie,
+            AVG(m.duration) as avg_duration,
+            COUNT(DISTINCT p.production_company) as companies_worked_with
+        FROM movie_person mp
+        INNER JOIN person pe ON mp.person_id = pe.person_id
+        INNER JOIN movie_info m ON mp.imdb_title_id = m.imdb_title_id
+        INNER JOIN production_info p ON mp.imdb_title_id = p.imdb_title_id
+        LEFT JOIN rating_info r ON mp.imdb_title_id = r.imdb_title_id
+        GROUP BY mp.role, pe.person_id, pe.name
+    """, "role, person_id"),
+    ("mv_language_stats", """
+        SELECT
+            l.language_id,
+            l.name as language,
+            COUNT(*) as movie_count,
+            AVG(r.avg_vote) as avg_rating,
+            COUNT(DISTINCT p.production_company) as production_companies
+        FROM movie_language ml
+        INNER JOIN language l ON ml.language_id = l.language_id
+        INNER JOIN production_info p ON ml.imdb_title_id = p.imdb_title_id
+        LEFT JOIN rating_info r ON ml.imdb_title_id = r.imdb_title_id
+        GROUP BY l.language_id, l.name
+    """, "language_id"),
+]
+
+# Secondary indexes for the ORDER BY ... LIMIT of the services
+_VIEW_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_mv_person_stats_count ON mv_person_stats (role, movie_count DESC)",
+]
+
+# Views replaced by the delta-maintained rollups of scripts/rollups.py
+_RETIRED_VIEWS = ["mv_rating_distribution", "mv_rating_trends", "mv_rating_duration", "mv_production_companies"]
+
+def ensure_materialized_views(bind) -> None:
+    """Create the missing materialized views (populated) and their indexes."""
+    with bind.begin() as connection:
+        for name in _RETIRED_VIEWS:
+            connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {name}"))
+        for name, definition, unique_columns in MATERIALIZED_VIEWS:
+            connection.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {definition}"))
+            connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{name} ON {name} ({unique_columns})"))
+        for statement in _VIEW_INDEXES:
+            connection.execute(text(statement))
+
+def refresh_materialized_views(bind, concurrently: bool = True) -> dict:
+    """
+    Refresh every materialized view, one transaction each.
+
+    CONCURRENTLY keeps the views readable while they are rebuilt. Returns
+    the seconds spent per view.
+    """
+    ensure_materialized_views(bind)
+    mode = "CONCURRENTLY " if concurrently else ""
+    timings = {}
+    for name, _, _ in MATERIALIZED_VIEWS:
+        start = time.time()
+        with bind.begin() as connection:
+            connection.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{name}"))
+        timings[name] = time.time() - start
+    return timings
+
+def drop_materialized_views(bind) -> None:
+    """Drop every view (they block DROP TABLE on the tables they read)."""
+    with bind.begin() as connection:
+        for name in [view for view, _, _ in reversed(MATERIALIZED_VIEWS)] + _RETIRED_VIEWS:
+            connection.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {name}"))
+
+if __name__ == "__main__":
+    from database import engine
+    for view, seconds in refresh_materialized_views(engine).items():
+        print(f"{view}: {seconds:.2f}s")
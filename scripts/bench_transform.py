@@ -0,0 +1,59 @@
+import json
+import sys
+import os
+import time
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.extract import extract_movies
+from scripts.transform import LIST_COLUMNS, encode_json_arrays
+
+def encode_with_apply(series: pd.Series) -> pd.Series:
+    """Previous implementation: one split and json.dumps call per row."""
+    return series.apply(
+        lambda value: json.dumps([name.strip(" ") for name in value.strip().split(",")], ensure_ascii=False)
+    )
+
+def run_benchmark(path: str = "data/imdb_movies_final.csv", repeat: int = 5):
+    """
+    Compare the vectorized list-field encoder used by transform_movies
+    (encode_json_arrays) against the per-row apply.
+
+    Fails if any encoded column differs from the previous output.
+    """
+    df = extract_movies(path)
+    columns = {col: df[col].fillna("Unknown").astype(str) for col in LIST_COLUMNS}
+
+    print(f"Rows: {len(df)} | Columns: {', '.join(LIST_COLUMNS)} | Repeat: {repeat}")
+    print("-" * 60)
+
+    total_apply = total_vectorized = 0.0
+    for col, series in columns.items():
+        expected = encode_with_apply(series)
+        actual = encode_json_arrays(series)
+        if expected.tolist() != actual.tolist():
+            mismatches = (expected.astype(object) != actual.astype(object)).sum()
+            raise AssertionError(f"{col}: {mismatches} rows differ from json.dumps output")
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            encode_with_apply(series)
+        apply_time = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            encode_json_arrays(series)
+        vectorized_time = (time.perf_counter() - start) / repeat
+
+        total_apply += apply_time
+        total_vectorized += vectorized_time
+        print(f"  {col:<10} apply: {apply_time*1000:8.2f}ms  vectorized: {vectorized_time*1000:8.2f}ms  "
+              f"({apply_time/vectorized_time:.1f}x)")
+
+    print("-" * 60)
+    print(f"  {'total':<10} apply: {total_apply*1000:8.2f}ms  vectorized: {total_vectorized*1000:8.2f}ms  "
+          f"({total_apply/total_vectorized:.1f}x)")
+    print("Output identical to json.dumps for all columns")
+
+if __name__ == "__main__":
+    run_benchmark(*sys.argv[1:2])
@@ -0,0 +1,182 @@
+import logging
+import os
+import sys
+from typing import Iterable, Optional
+from sqlalchemy import text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.aggregates import refresh_materialized_views
+from scripts.services.cache import bump_data_version
+
+# production_info column -> (dimension table, bridge table, role in movie_person)
+BRIDGE_SOURCES = {
+    "director": ("person", "movie_person", "director"),
+    "writer": ("person", "movie_person", "writer"),
+    "actors": ("person", "movie_person", "actor"),
+    "country": ("country", "movie_country", None),
+    "language": ("language", "movie_language", None),
+}
+
+logger = logging.getLogger(__name__)
+
+# Longest name each dimension table accepts (String lengths in models.py)
+_NAME_LENGTH = {"person": 250, "country": 100, "language": 100}
+
+# Rows still holding a list as one JSON string (loads before the transform produced arrays)
+LEGACY_LISTS = " OR ".join(f"jsonb_typeof({column}) = 'string'" for column in BRIDGE_SOURCES)
+
+def _list_elements(value_sql: str) -> str:
+    """Set-returning SQL producing (name, ordinal) for one list value of production_info."""
+    # The transform stores each list as a JSON array of names
+    return f"jsonb_array_elements_text({value_sql}) WITH ORDINALITY AS t(name, ordinal)"
+
+def refresh_bridges(connection, ids: Optional[Iterable[str]] = None) -> dict:
+    """
+    Rebuild the bridge rows of `ids` (every movie when None) from production_info.
+
+    Runs on the connection that loaded production_info, so the bridges
+    commit or roll back with it. Names are split and trimmed in SQL; new
+    names are added to the person/country/language dimensions. Returns the
+    number of bridge rows written per table.
+    """
+    params = {}
+    id_filter = ""
+    if ids is not None:
+        params["ids"] = list(ids)
+        id_filter = "WHERE p.imdb_title_id = ANY(:ids)"
+
+    for bridge in ("movie_person", "movie_country", "movie_language"):
+        if ids is None:
+            connection.execute(text(f"DELETE FROM {bridge}"))
+        else:
+            connection.execute(text(f"DELETE FROM {bridge} WHERE imdb_title_id = ANY(:ids)"), params)
+
+    sources = ", ".join(f"('{column}', p.{column})" for column in BRIDGE_SOURCES)
+    connection.execute(text(f"""
+        CREATE TEMP TABLE bridge_names ON COMMIT DROP AS
+        SELECT p.imdb_title_id, v.source, btrim(t.name) AS name, t.ordinal
+        FROM production_info p
+        CROSS JOIN LATERAL (VALUES {sources}) AS v(source, value)
+        CROSS JOIN LATERAL {_list_elements("v.value")}
+        {id_filter}
+    """), params)
+    connection.execute(text("DELETE FROM bridge_names WHERE name IN ('', 'Unknown')"))
+
+    written = {}
+    for dimension, bridge in dict.fromkeys((d, b) for d, b, _ in BRIDGE_SOURCES.values()):
+        key = f"{dimension}_id"
+        length = _NAME_LENGTH[dimension]
+        columns = [column for column, (d, _, _) in BRIDGE_SOURCES.items() if d == dimension]
+        source_list = ", ".join(f"'{column}'" for column in columns)
+
+        connection.execute(text(f"""
+            INSERT INTO {dimension} (name)
+            SELECT DISTINCT left(name, {length}) FROM bridge_names WHERE source IN ({source_list})
+            ON CONFLICT (name) DO NOTHING
+        """))
+
+        if bridge == "movie_person":
+            roles = " ".join(f"WHEN '{column}' THEN '{BRIDGE_SOURCES[column][2]}'" for column in columns)
+            result = connection.execute(text(f"""
+                INSERT INTO movie_person (imdb_title_id, role, person_id, ordinal)
+                SELECT b.imdb_title_id, CASE b.source {roles} END, d.person_id, MIN(b.ordinal)
+                FROM bridge_names b
+                JOIN person d ON d.name = left(b.name, {length})
+                WHERE b.source IN ({source_list})
+                GROUP BY 1, 2, 3
+            """))
+        else:
+            result = connection.execute(text(f"""
+                INSERT INTO {bridge} (imdb_title_id, {key}, ordinal)
+                SELECT b.imdb_title_id, d.{key}, MIN(b.ordinal)
+                FROM bridge_names b
+                JOIN {dimension} d ON d.name = left(b.name, {length})
+                WHERE b.source IN ({source_list})
+                GROUP BY 1, 2
+            """))
+        written[bridge] = result.rowcount
+
+    connection.execute(text("DROP TABLE bridge_names"))
+    return written
+
+def _legacy_list_sql(column: str) -> str:
+    """SQL turning one legacy string value of `column` into a JSON array of trimmed names."""
+    # Earlier ORM loads stored json.dumps of the value, so the string may hold
+    # another JSON string ('"A, B"') or array ('["A", "B"]') that is unwrapped first
+    return f"""COALESCE((
+        SELECT jsonb_agg(btrim(t.name) ORDER BY t.ordinal)
+        FROM (
+            SELECT CASE WHEN raw ~ '^".*"$' THEN raw::jsonb #>> '{{}}' ELSE raw END AS value
+            FROM (SELECT {column} #>> '{{}}' AS raw) AS r
+        ) AS u
+        CROSS JOIN LATERAL (
+            SELECT * FROM jsonb_array_elements_text(CASE WHEN u.value ~ '^\\[.*\\]$' THEN u.value::jsonb END)
+                WITH ORDINALITY
+            UNION ALL
+            SELECT * FROM regexp_split_to_table(CASE WHEN u.value !~ '^\\[.*\\]$' THEN u.value END, ',')
+                WITH ORDINALITY
+        ) AS t(name, ordinal)
+    ), '[]'::jsonb)"""
+
+def ensure_list_arrays(bind) -> int:
+    """
+    Convert list values loaded as a comma-separated JSON string (before the
+    transform produced arrays) into JSON arrays of trimmed names. Returns the
+    number of production_info rows rewritten.
+
+    The bridges of the rewritten movies are rebuilt in the same transaction
+    (names backfilled from the string form are dropped), then the views over
+    them are refreshed and the data version bumped.
+    """
+    updates = ", ".join(
+        f"{column} = CASE WHEN jsonb_typeof({column}) = 'string' THEN {_legacy_list_sql(column)} ELSE {column} END"
+        for column in BRIDGE_SOURCES
+    )
+    with bind.begin() as connection:
+        ids = connection.execute(text(f"""
+            UPDATE production_info
+            SET {updates}, updated_at = timezone('utc', now())
+            WHERE {LEGACY_LISTS}
+            RETURNING imdb_title_id
+        """)).scalars().all()
+        if not ids:
+            return 0
+        refresh_bridges(connection, ids)
+        for dimension, bridge, _ in dict.fromkeys(BRIDGE_SOURCES.values()):
+            key = f"{dimension}_id"
+            connection.execute(text(f"""
+                DELETE FROM {dimension} d
+                WHERE (d.name LIKE '"%' OR d.name LIKE '%"')
+                    AND NOT EXISTS (SELECT 1 FROM {bridge} b WHERE b.{key} = d.{key})
+            """))
+
+    refresh_materialized_views(bind)
+    bump_data_version(bind)
+    return len(ids)
+
+def ensure_bridges(bind) -> bool:
+    """
+    Backfill the bridge tables once for data loaded before they existed.
+
+    Skipped while production_info still holds lists as JSON strings: their
+    names would be split with the quotes of the encoding (run
+    ensure_list_arrays first).
+    """
+    with bind.begin() as connection:
+        if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM production_info WHERE {LEGACY_LISTS})")).scalar():
+            logger.warning("production_info has lists stored as JSON strings, bridge backfill skipped")
+            return False
+        missing = connection.execute(text("""
+            SELECT EXISTS (SELECT 1 FROM production_info)
+                AND NOT EXISTS (SELECT 1 FROM movie_person)
+                AND NOT EXISTS (SELECT 1 FROM movie_country)
+                AND NOT EXISTS (SELECT 1 FROM movie_language)
+        """)).scalar()
+        if missing:
+            refresh_bridges(connection)
+    return bool(missing)
+
+if __name__ == "__main__":
+    from database import engine
+    with engine.begin() as connection:
+        print(refresh_bridges(connection))
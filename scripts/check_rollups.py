@@ -0,0 +1,103 @@
+import sys
+import os
+import pandas as pd
+from sqlalchemy import text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Movie_Info, Production_Info, Rating_Info
+from scripts.load import copy_upsert
+from scripts.rollups import ROLLUPS, snapshot_contributions, rollup_deltas, apply_rollup_deltas, rebuild_rollups
+
+# Titles written by the check; everything runs in one transaction that is rolled back
+CHECK_IDS = [f"ck{i:07d}" for i in range(1, 7)]
+
+def _movies(rows: list) -> pd.DataFrame:
+    """Transformed-like rows: (year, duration, avg_vote, votes, users, critics, company) per CHECK_IDS entry."""
+    frame = pd.DataFrame(rows, columns=[
+        "year", "duration", "avg_vote", "votes", "reviews_from_users", "reviews_from_critics", "production_company"
+    ])
+    frame.insert(0, "imdb_title_id", CHECK_IDS[:len(rows)])
+    # Like the transform output: integer columns with gaps are float
+    frame = frame.astype({"year": "float64", "duration": "float64"})
+    frame["title"] = "Rollup check " + frame["imdb_title_id"]
+    frame["description"] = "No description given"
+    for column in ("director", "writer", "actors", "country", "language"):
+        frame[column] = '["Unknown"]'
+    return frame
+
+# Each step replaces the rows of the previous one: an insert, then rating and
+# vote updates (ties on the tenths rounding), then moves between years (to and
+# from the NULL-year sentinel), companies (named, Unknown, empty) and durations
+STEPS = {
+    "insert": _movies([
+        (1999, 95, 7.25, 1200, 10, 2, "Check Films"),
+        (1999, 59, 6.05, 300, 3, 0, "Check Films"),
+        (None, 130, 8.35, 50, 1, 1, "Check Films"),
+        (2005, None, 5.0, 10, 0, 0, "Unknown"),
+        (2005, 200, 9.95, 99999, 500, 80, "Other Studio"),
+        (1999, 90, 0.0, 0, 0, 0, ""),
+    ]),
+    "update": _movies([
+        (1999, 95, 7.35, 1500, 12, 2, "Check Films"),
+        (1999, 59, 6.15, 300, 3, 1, "Check Films"),
+        (None, 130, 8.45, 70, 1, 1, "Check Films"),
+        (2005, None, 5.05, 10, 0, 0, "Unknown"),
+        (2005, 200, 9.85, 99000, 510, 80, "Other Studio"),
+        (1999, 90, 1.0, 1, 0, 0, ""),
+    ]),
+    "move": _movies([
+        (2001, 121, 7.35, 1500, 12, 2, "Other Studio"),
+        (None, 59, 6.15, 300, 3, 1, "Check Films"),
+        (1999, None, 8.45, 70, 1, 1, "Unknown"),
+        (2005, 61, 5.05, 10, 0, 0, "Check Films"),
+        (1999, 200, 9.85, 99000, 510, 80, ""),
+        (2001, 150, 1.0, 1, 0, 0, "Other Studio"),
+    ]),
+}
+
+def _read_rollups(connection) -> dict:
+    """Every rollup table as sorted rows; empty groups left by deltas must be all zero and are dropped."""
+    tables = {}
+    for table, (keys, measures) in ROLLUPS.items():
+        frame = pd.read_sql(text(f"SELECT {', '.join(keys + measures)} FROM {table}"), connection)
+        empty = frame["movie_count"] == 0
+        if (frame.loc[empty, measures] != 0).any(axis=None):
+            raise AssertionError(f"{table}: groups without movies keep non-zero measures")
+        frame = frame[~empty].sort_values(keys).reset_index(drop=True)
+        tables[table] = frame.astype({column: "int64" for column in measures})
+    return tables
+
+def _compare(step: str, incremental: dict, rebuilt: dict):
+    for table in ROLLUPS:
+        if not incremental[table].equals(rebuilt[table]):
+            merged = incremental[table].merge(rebuilt[table], how="outer", indicator=True)
+            differing = merged[merged["_merge"] != "both"]
+            raise AssertionError(f"{step}: {table} differs from rebuild_rollups\n{differing.to_string(index=False)}")
+
+def run_check(bind):
+    """
+    Apply rollup deltas step by step and compare every rollup table with a
+    full rebuild_rollups after each step. Fails on the first difference;
+    nothing is committed.
+    """
+    with bind.connect() as connection:
+        transaction = connection.begin()
+        try:
+            rebuild_rollups(connection)
+            for step, movies in STEPS.items():
+                deltas = rollup_deltas(snapshot_contributions(connection, movies["imdb_title_id"]), movies)
+                for model in (Movie_Info, Production_Info, Rating_Info):
+                    copy_upsert(movies, model, connection)
+                apply_rollup_deltas(connection, deltas)
+                incremental = _read_rollups(connection)
+
+                rebuild_rollups(connection)
+                _compare(step, incremental, _read_rollups(connection))
+                print(f"  {step:<8} deltas on {sum(len(frame) for frame in deltas.values())} groups match rebuild_rollups")
+        finally:
+            transaction.rollback()
+    print("Rollup deltas identical to rebuild_rollups for every step")
+
+if __name__ == "__main__":
+    from database import engine
+    run_check(engine)
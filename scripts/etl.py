@@ -5,10 +5,14 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts.extract import extract_movies
-from scripts.transform import transform_movies, csv_to_json, json_to_csv
+from scripts.extract import extract_movies, extract_movies_chunked
+from scripts.transform import transform_movies
+from scripts.export import export_raw_artifacts
+from scripts.aggregates import refresh_materialized_views
+from scripts.services.cache import bump_data_version
+from scripts.fingerprint import load_changes, count_deleted
 from scripts.validate import validate_movies
-from scripts.load import load_tables, load_incremental
+from scripts.load import load_tables, load_incremental, get_last_loaded_date, set_last_loaded_date
 from scripts.monitor import log_event, send_alert
 from scripts.logging_conf import configure_logging
 from sqlalchemy.orm import sessionmaker
@@ -17,6 +21,14 @@ from database import engine
 SessionLocal = sessionmaker(bind=engine)
 logger = logging.getLogger(__name__)
 
+# Rows per chunk for the streaming mode; unset/0 keeps the in-memory pipeline
+ETL_CHUNK_SIZE = int(os.getenv("ETL_CHUNK_SIZE", "0"))
+# Write the raw CSV/JSON artifacts after the load commits
+ETL_EXPORT_RAW = os.getenv("ETL_EXPORT_RAW", "true").lower() == "true"
+# "watermark" loads rows newer than the stored date_published,
+# "fingerprint" loads rows whose content hash is new or changed
+LOAD_STRATEGY = os.getenv("LOAD_STRATEGY", "watermark")
+
 def format_duration(seconds):
     """Format duration in seconds to human readable format"""
     if seconds < 1:
@@ -28,10 +40,37 @@ def format_duration(seconds):
         secs = seconds % 60
         return f"{minutes}m {secs:.2f}s"
 
-def run_etl():
+def _log_changes(summary: dict):
+    """Log the inserted/updated/deleted counts of a fingerprint load."""
+    prefix = "[DRY RUN] " if summary["dry_run"] else ""
+    log_event(
+        f"{prefix}Changes detected: {summary['inserted']} inserted, {summary['updated']} updated, "
+        f"{summary['unchanged']} unchanged, {summary['deleted']} deleted"
+    )
+
+def run_etl(
+    chunksize: int = None,
+    export_raw: bool = ETL_EXPORT_RAW,
+    strategy: str = None,
+    dry_run: bool = False
+):
     """
     Execute ETL pipeline for PostgreSQL database with performance metrics
+
+    When `chunksize` (or ETL_CHUNK_SIZE) is set the pipeline runs in
+    streaming mode, see run_etl_chunked. With `export_raw` the raw
+    CSV/JSON artifacts are written once the load has committed.
+    `strategy` picks the change detection (LOAD_STRATEGY by default); a
+    fingerprint `dry_run` writes nothing and returns the change counts.
     """
+    strategy = strategy or LOAD_STRATEGY
+    if dry_run and strategy != "fingerprint":
+        raise ValueError("dry_run is only supported with the fingerprint strategy")
+
+    chunksize = chunksize or ETL_CHUNK_SIZE
+    if chunksize:
+        return run_etl_chunked(chunksize, export_raw=export_raw, strategy=strategy, dry_run=dry_run)
+
     session = SessionLocal()
     total_start_time = time.time()
     
@@ -54,23 +93,7 @@ def run_etl():
         transform_start = time.time()
         log_event("Phase 2: Data Transformation")
         
-        # CSV to JSON conversion
-        json_convert_start = time.time()
-        csv_to_json("data/imdb_movies_final.csv", "raw/imdb_movies_final.json")
-        json_convert_duration = time.time() - json_convert_start
-        log_event(f"CSV to JSON conversion: {format_duration(json_convert_duration)}")
-        
-        # Main transformation
-        main_transform_start = time.time()
         tables = transform_movies(df)
-        main_transform_duration = time.time() - main_transform_start
-        log_event(f"Data transformation and cleaning: {format_duration(main_transform_duration)}")
-        
-        # JSON to CSV back-conversion
-        csv_convert_start = time.time()
-        json_to_csv("raw/imdb_movies_final.json", "raw/imdb_movies_back.csv")
-        csv_convert_duration = time.time() - csv_convert_start
-        log_event(f"JSON to CSV back-conversion: {format_duration(csv_convert_duration)}")
         
         transform_duration = time.time() - transform_start
         log_event(f"Total transformation time: {format_duration(transform_duration)}")
@@ -99,13 +122,29 @@ def run_etl():
         log_event("Phase 4: PostgreSQL Loading")
         
         # Incremental load to PostgreSQL
-        load_incremental(tables, session)
+        load_timings = {}
+        if strategy == "fingerprint":
+            changes = load_changes(tables, session, dry_run=dry_run, timings=load_timings)
+            _log_changes(changes)
+            if dry_run:
+                session.rollback()
+                return changes
+        else:
+            load_incremental(tables, session, timings=load_timings)
         session.commit()
         
         sql_load_duration = time.time() - sql_load_start
         log_event(f"PostgreSQL load completed: {format_duration(sql_load_duration)}")
+        for table_name, table_duration in load_timings.items():
+            log_event(f"  {table_name}: {format_duration(table_duration)}")
         log_event(f"PostgreSQL throughput: {len(tables['full'])/sql_load_duration:.0f} records/second")
         
+        # === AGGREGATES (after commit) ===
+        refresh_duration = _refresh_after_load()
+        
+        # === EXPORT PHASE (after commit, optional) ===
+        export_duration = _export_after_load(export_raw)
+        
         # === PIPELINE SUMMARY ==
         total_duration = time.time() - total_start_time
         log_event("ETL Pipeline Completed Successfully")
@@ -116,6 +155,11 @@ def run_etl():
         log_event(f"  Transformation phase: {format_duration(transform_duration)} ({transform_duration/total_duration*100:.1f}%)")
         log_event(f"  Validation phase: {format_duration(validate_duration)} ({validate_duration/total_duration*100:.1f}%)")
         log_event(f"  PostgreSQL load: {format_duration(sql_load_duration)} ({sql_load_duration/total_duration*100:.1f}%)")
+        for table_name, table_duration in load_timings.items():
+            log_event(f"    {table_name}: {format_duration(table_duration)}")
+        log_event(f"  Aggregate refresh: {format_duration(refresh_duration)} ({refresh_duration/total_duration*100:.1f}%)")
+        if export_raw:
+            log_event(f"  Raw export (post-load): {format_duration(export_duration)} ({export_duration/total_duration*100:.1f}%)")
         log_event(f"  Total records processed: {len(df)}")
         log_event(f"  Overall throughput: {len(df)/total_duration:.1f} records/second")
         log_event("=" * 50)
@@ -131,6 +175,178 @@ def run_etl():
     finally:
         session.close()
 
+def _refresh_after_load() -> float:
+    """
+    Refresh the dashboard materialized views, then bump the data version so
+    cached service results are dropped; on failure the views keep the previous data.
+    """
+    refresh_start = time.time()
+    try:
+        log_event("Refreshing materialized aggregates")
+        for view, seconds in refresh_materialized_views(engine).items():
+            log_event(f"  {view}: {format_duration(seconds)}")
+    except Exception as e:
+        log_event(f"Aggregate refresh failed (load already committed): {str(e)}", level="error")
+    try:
+        log_event(f"Data version bumped to {bump_data_version(engine)}")
+    except Exception as e:
+        log_event(f"Data version bump failed, service caches expire by TTL: {str(e)}", level="error")
+    return time.time() - refresh_start
+
+def _export_after_load(export_raw: bool) -> float:
+    """Run the raw export stage; a failure here never undoes the committed load."""
+    if not export_raw:
+        return 0.0
+    export_start = time.time()
+    try:
+        log_event("Phase 5: Raw CSV/JSON export")
+        export_raw_artifacts("data/imdb_movies_final.csv", "raw")
+    except Exception as e:
+        log_event(f"Raw export failed (load already committed): {str(e)}", level="error")
+    return time.time() - export_start
+
+def run_etl_chunked(
+    chunksize: int,
+    export_raw: bool = ETL_EXPORT_RAW,
+    strategy: str = "watermark",
+    dry_run: bool = False
+):
+    """
+    Execute ETL pipeline for PostgreSQL in streaming mode.
+
+    The CSV is read `chunksize` rows at a time and every chunk goes through
+    transform -> validate -> load before the next one is read, so peak memory
+    depends on the chunk size instead of the file size. All chunks share one
+    transaction: the watermark is stored and the session committed only after
+    the last chunk loads.
+    """
+    session = SessionLocal()
+    total_start_time = time.time()
+
+    try:
+        log_event("Starting ETL pipeline - PostgreSQL (streaming mode)")
+        log_event(f"Process initiated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        log_event(f"Chunk size: {chunksize} rows")
+
+        last_date = get_last_loaded_date(session)
+        max_loaded_date = None
+        load_timings = {}
+        changes = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": None, "dry_run": dry_run}
+        seen_ids = set()
+
+        extract_duration = transform_duration = validate_duration = sql_load_duration = 0.0
+        total_rows = 0
+        chunk_count = 0
+
+        chunks = extract_movies_chunked("data/imdb_movies_final.csv", chunksize=chunksize)
+        while True:
+            chunk_start = time.time()
+
+            # === EXTRACT ===
+            df = next(chunks, None)
+            if df is None:
+                break
+            chunk_count += 1
+            extract_time = time.time() - chunk_start
+
+            # === TRANSFORM ===
+            step_start = time.time()
+            tables = transform_movies(df, append=chunk_count > 1)
+            transform_time = time.time() - step_start
+
+            # === VALIDATE ===
+            step_start = time.time()
+            errors = validate_movies(tables["full"], seen_ids=seen_ids)
+            validate_time = time.time() - step_start
+
+            if errors:
+                session.rollback()
+                log_event(f"Validation failed on chunk {chunk_count} with {len(errors)} errors", level="error")
+                for idx, error in enumerate(errors[:10], 1):
+                    log_event(f"Error {idx}: {error}", level="error")
+                send_alert("ETL Validation Errors", "\n".join(errors), "admin@example.com")
+                return None
+
+            # === LOAD ===
+            step_start = time.time()
+            if strategy == "fingerprint":
+                chunk_changes = load_changes(
+                    tables, session, dry_run=dry_run, timings=load_timings, check_deleted=False
+                )
+                for key in ("inserted", "updated", "unchanged"):
+                    changes[key] += chunk_changes[key]
+                chunk_max_date = None
+            else:
+                chunk_max_date = load_incremental(
+                    tables, session, last_date=last_date, update_metadata=False, timings=load_timings
+                )
+            if chunk_max_date is not None and (max_loaded_date is None or chunk_max_date > max_loaded_date):
+                max_loaded_date = chunk_max_date
+            load_time = time.time() - step_start
+
+            rows = len(df)
+            total_rows += rows
+            extract_duration += extract_time
+            transform_duration += transform_time
+            validate_duration += validate_time
+            sql_load_duration += load_time
+
+            chunk_duration = time.time() - chunk_start
+            log_event(
+                f"Chunk {chunk_count}: {rows} rows in {format_duration(chunk_duration)} "
+                f"({rows/chunk_duration:.0f} rows/second) - "
+                f"extract {format_duration(extract_time)}, transform {format_duration(transform_time)}, "
+                f"validate {format_duration(validate_time)}, load {format_duration(load_time)}"
+            )
+
+            # Release the chunk before reading the next one
+            del df, tables
+
+        if strategy == "fingerprint":
+            changes["deleted"] = count_deleted(session, seen_ids)
+            _log_changes(changes)
+            if dry_run:
+                session.rollback()
+                return changes
+
+        if max_loaded_date is not None:
+            set_last_loaded_date(session, max_loaded_date)
+        session.commit()
+
+        refresh_duration = _refresh_after_load()
+        export_duration = _export_after_load(export_raw)
+
+        # === PIPELINE SUMMARY ==
+        total_duration = time.time() - total_start_time
+        log_event("ETL Pipeline Completed Successfully")
+        log_event("=" * 50)
+        log_event("PERFORMANCE SUMMARY (streaming mode):")
+        log_event(f"  Total pipeline duration: {format_duration(total_duration)}")
+        log_event(f"  Chunks processed: {chunk_count} x {chunksize} rows")
+        log_event(f"  Extraction phase: {format_duration(extract_duration)}")
+        log_event(f"  Transformation phase: {format_duration(transform_duration)}")
+        log_event(f"  Validation phase: {format_duration(validate_duration)}")
+        log_event(f"  PostgreSQL load: {format_duration(sql_load_duration)}")
+        for table_name, table_duration in load_timings.items():
+            log_event(f"    {table_name}: {format_duration(table_duration)}")
+        log_event(f"  Aggregate refresh: {format_duration(refresh_duration)}")
+        if export_raw:
+            log_event(f"  Raw export (post-load): {format_duration(export_duration)}")
+        log_event(f"  Total records processed: {total_rows}")
+        log_event(f"  Overall throughput: {total_rows/total_duration:.1f} records/second")
+        log_event("=" * 50)
+
+        return {"chunks": chunk_count, "records": total_rows}
+
+    except Exception as e:
+        session.rollback()
+        error_duration = time.time() - total_start_time
+        log_event(f"ETL failed after {format_duration(error_duration)}: {str(e)}", level="error")
+        send_alert("ETL Failure", f"Pipeline failed after {format_duration(error_duration)}\nError: {str(e)}", "admin@example.com")
+        raise
+    finally:
+        session.close()
+
 if __name__ == "__main__":
     configure_logging()
     run_etl()
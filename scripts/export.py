@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.transform import csv_to_json, json_to_csv
+from scripts.monitor import log_event
+
+# Raw CSV <-> JSON artifacts, produced outside the load path
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_COMPRESS = os.getenv("EXPORT_COMPRESS", "true").lower() == "true"
+
+def export_raw_artifacts(
+    csv_path: str = "data/imdb_movies_final.csv",
+    output_dir: str = "raw",
+    chunksize: int = EXPORT_CHUNK_SIZE,
+    compress: bool = EXPORT_COMPRESS
+) -> dict:
+    """
+    Export the source CSV as JSON Lines and convert it back to CSV.
+
+    Both files are streamed `chunksize` rows at a time and gzip-compressed
+    by default. Nothing in the ETL reads them, so this stage runs after the
+    PostgreSQL load commits or on demand through POST /export-raw.
+    """
+    suffix = ".gz" if compress else ""
+    json_path = os.path.join(output_dir, f"imdb_movies_final.json{suffix}")
+    back_csv_path = os.path.join(output_dir, f"imdb_movies_back.csv{suffix}")
+
+    start = time.time()
+    csv_to_json(csv_path, json_path, chunksize=chunksize)
+    json_duration = time.time() - start
+    log_event(f"CSV to JSON export: {json_duration:.2f}s -> {json_path}")
+
+    start = time.time()
+    json_to_csv(json_path, back_csv_path, chunksize=chunksize)
+    csv_duration = time.time() - start
+    log_event(f"JSON to CSV back-conversion: {csv_duration:.2f}s -> {back_csv_path}")
+
+    return {
+        "json_path": json_path,
+        "csv_path": back_csv_path,
+        "json_seconds": round(json_duration, 2),
+        "csv_seconds": round(csv_duration, 2)
+    }
+
+if __name__ == "__main__":
+    export_raw_artifacts()
@@ -1,9 +1,119 @@
+import hashlib
+import logging
+import os
 import pandas as pd
 from pathlib import Path
+from typing import Iterator
 
-def extract_movies(path: str = "data/imdb_movies_final.csv") -> pd.DataFrame:
-    """Extract movies dataset from CSV."""
+try:
+    import pyarrow as pa
+except ImportError:  # snapshots are an optimisation, plain CSV parsing still works
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Columnar snapshots of parsed CSVs, shared by the PostgreSQL and MongoDB ETLs
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+# "stat" keys snapshots by mtime+size, "content" by a SHA-256 of the file
+SNAPSHOT_KEY = os.getenv("SNAPSHOT_KEY", "stat")
+
+# Explicit column types so every chunk, full read and snapshot is parsed the
+# same way (no type inference drifting between int, float and object). "str"
+# is the Arrow-backed string dtype on pandas 3 (object before), which the
+# snapshot hands back without copying its memory-mapped strings
+MOVIES_DTYPES = {
+    "imdb_title_id": "str",
+    "title": "str",
+    "year": "float64",
+    "date_published": "str",
+    "duration": "float64",
+    "description": "str",
+    "avg_vote": "float64",
+    "votes": "float64",
+    "reviews_from_users": "float64",
+    "reviews_from_critics": "float64",
+    "language": "str",
+    "country": "str",
+    "director": "str",
+    "writer": "str",
+    "actors": "str",
+    "production_company": "str",
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def extract_movies(path: str = "data/imdb_movies_final.csv", use_snapshot: bool = True) -> pd.DataFrame:
+    """Extract movies dataset from CSV, through the columnar snapshot when available."""
     csv_path = Path(path)
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV file not found: {path}")
-    return pd.read_csv(csv_path, encoding="utf-8")
+    if use_snapshot and pa is not None:
+        try:
+            return _read_snapshot(csv_path)
+        except (pa.ArrowException, OSError) as e:
+            logger.warning(f"Snapshot unavailable for {csv_path}, reading the CSV: {e}")
+    return _read_csv(csv_path)
+
+def _read_csv(csv_path: Path) -> pd.DataFrame:
+    return pd.read_csv(csv_path, encoding="utf-8", dtype=MOVIES_DTYPES)
+
+def _snapshot_key(csv_path: Path) -> str:
+    """Identify a CSV version, by mtime+size or by content hash, and the dtypes it is parsed with."""
+    digest = hashlib.sha256(repr(sorted(MOVIES_DTYPES.items())).encode())
+    if SNAPSHOT_KEY == "content":
+        with open(csv_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        stat = csv_path.stat()
+        digest.update(f"{csv_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:16]
+
+def snapshot_path(path: str = "data/imdb_movies_final.csv") -> Path:
+    """Location of the Arrow snapshot for the current version of `path`."""
+    csv_path = Path(path)
+    return Path(SNAPSHOT_DIR) / f"{csv_path.stem}-{_snapshot_key(csv_path)}.arrow"
+
+def _write_snapshot(csv_path: Path, target: Path) -> None:
+    """Parse the CSV once (with MOVIES_DTYPES) and store it as an uncompressed Arrow IPC file."""
+    table = pa.Table.from_pandas(_read_csv(csv_path), preserve_index=False)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".arrow.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, target)
+
+    # Older snapshots of the same file are no longer reachable
+    for stale in target.parent.glob(f"{csv_path.stem}-*.arrow"):
+        if stale != target and stale.stem.rsplit("-", 1)[0] == csv_path.stem:
+            stale.unlink(missing_ok=True)
+
+def _read_snapshot(csv_path: Path) -> pd.DataFrame:
+    """Memory-map the snapshot of `csv_path`, building it on first sight."""
+    target = snapshot_path(str(csv_path))
+    if not target.exists():
+        logger.info(f"Snapshot miss for {csv_path}, writing {target}")
+        _write_snapshot(csv_path, target)
+    else:
+        logger.info(f"Snapshot hit for {csv_path}: {target}")
+
+    with pa.memory_map(str(target), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+def extract_movies_chunked(
+    path: str = "data/imdb_movies_final.csv",
+    chunksize: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Extract movies dataset from CSV as a stream of DataFrames of at most `chunksize` rows."""
+    csv_path = Path(path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {path}")
+    if chunksize < 1:
+        raise ValueError("chunksize must be a positive integer")
+
+    with pd.read_csv(csv_path, encoding="utf-8", dtype=MOVIES_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
@@ -0,0 +1,91 @@
+import os
+import sys
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import RowFingerprint
+from scripts.load import LOAD_MODELS, coerce_integer_columns, copy_upsert, write_rows
+
+# Every column stored in movie_info, production_info and rating_info
+FINGERPRINT_COLUMNS = list(dict.fromkeys(
+    column.name for model in LOAD_MODELS.values() for column in model.__table__.columns
+))
+
+def fingerprint_rows(df: pd.DataFrame) -> pd.Series:
+    """Hash every loaded column of each row; returns hex fingerprints indexed by imdb_title_id."""
+    frame = df[FINGERPRINT_COLUMNS]
+    for model in LOAD_MODELS.values():
+        frame = coerce_integer_columns(frame, model.__table__)
+    hashes = pd.util.hash_pandas_object(frame, index=False)
+    return pd.Series(
+        [f"{value:016x}" for value in hashes.to_numpy()],
+        index=frame["imdb_title_id"].to_numpy(),
+        name="fingerprint"
+    )
+
+def stored_fingerprints(session: Session, ids) -> pd.Series:
+    """Fingerprints saved by previous runs for the given imdb_title_ids."""
+    rows = session.execute(
+        text("SELECT imdb_title_id, fingerprint FROM etl_row_fingerprint WHERE imdb_title_id = ANY(:ids)"),
+        {"ids": list(ids)}
+    ).all()
+    return pd.Series({row[0]: row[1] for row in rows}, dtype=object)
+
+def count_deleted(session: Session, ids) -> int:
+    """Titles fingerprinted by previous runs that are missing from `ids`."""
+    return session.execute(
+        text("SELECT COUNT(*) FROM etl_row_fingerprint WHERE NOT (imdb_title_id = ANY(:ids))"),
+        {"ids": list(ids)}
+    ).scalar()
+
+def save_fingerprints(fingerprints: pd.Series, session: Session):
+    """Upsert fingerprints of the rows just written."""
+    frame = pd.DataFrame({
+        "imdb_title_id": fingerprints.index,
+        "fingerprint": fingerprints.to_numpy(),
+        "updated_at": datetime.utcnow()
+    })
+    copy_upsert(frame, RowFingerprint, session.connection())
+
+def load_changes(
+    tables: dict,
+    session: Session,
+    dry_run: bool = False,
+    timings: dict = None,
+    check_deleted: bool = True
+) -> dict:
+    """
+    Load only the rows that are new or changed since the previous run.
+
+    Each transformed row is fingerprinted and compared with the hash stored
+    for its imdb_title_id: unknown ids are inserted, different hashes are
+    updated and everything else is skipped. With `dry_run` nothing is
+    written and only the counts are returned. Deleted titles are counted,
+    not removed; streaming runs pass `check_deleted=False` and call
+    count_deleted once at the end.
+    """
+    df_full = tables["full"]
+    fingerprints = fingerprint_rows(df_full)
+    previous = stored_fingerprints(session, fingerprints.index)
+
+    is_new = ~fingerprints.index.isin(previous.index)
+    is_changed = ~is_new & (fingerprints != previous.reindex(fingerprints.index)).to_numpy()
+    to_write = is_new | is_changed
+
+    summary = {
+        "inserted": int(is_new.sum()),
+        "updated": int(is_changed.sum()),
+        "unchanged": int((~to_write).sum()),
+        "deleted": count_deleted(session, fingerprints.index) if check_deleted else None,
+        "dry_run": dry_run
+    }
+
+    if dry_run or not to_write.any():
+        return summary
+
+    write_rows(df_full[to_write], session, timings)
+    save_fingerprints(fingerprints[to_write], session)
+    return summary
@@ -0,0 +1,77 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from scripts.services.cache import service_cache
+
+# Conditional GET (ETag / Last-Modified) for read endpoints whose answer only
+# changes when the ETL bumps the data version
+CONDITIONAL_GET_ENABLED = os.getenv("CONDITIONAL_GET", "true").lower() == "true"
+CONDITIONAL_PREFIXES = ("/api/", "/mongo/")
+# Read endpoints that do not depend on the loaded data
+CONDITIONAL_EXCLUDED = {"/api/cache/stats", "/mongo/indexes/check"}
+# Deploy identifier (e.g. the git commit) mixed into ETags with the app version,
+# so a deploy that changes response shapes does not 304 against old bodies
+APP_BUILD = os.getenv("APP_BUILD", "")
+
+def is_conditional(method: str, path: str) -> bool:
+    """Whether a request is answered from the data version validators."""
+    return (
+        CONDITIONAL_GET_ENABLED
+        and method == "GET"
+        and path.startswith(CONDITIONAL_PREFIXES)
+        and path not in CONDITIONAL_EXCLUDED
+    )
+
+def current_data_version(bind) -> tuple:
+    """Data version and its timestamp, re-read from etl_metadata at most every few seconds."""
+    if service_cache.version_stale():
+        with bind.connect() as connection:
+            service_cache.sync_version(connection)
+    return service_cache.version
+
+def last_modified(updated_at: Optional[datetime], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Last-Modified for a data version set at `updated_at` (naive UTC, as stored
+    in etl_metadata): the end of that second, and only once it is over. HTTP
+    dates have whole-second resolution, so a date inside the second could be
+    shared by a later bump in the same second; after it, any new version gets
+    a strictly later date and If-Modified-Since cannot match it.
+    """
+    if updated_at is None:
+        return None
+    updated_at = updated_at.replace(tzinfo=timezone.utc)
+    second_end = updated_at.replace(microsecond=0) + timedelta(seconds=1)
+    return second_end if (now or datetime.now(timezone.utc)) >= second_end else None
+
+def build_validators(
+    version: int, updated_at: Optional[datetime], path: str, query: str, app_version: str = ""
+) -> Dict[str, str]:
+    """ETag/Last-Modified headers for `path` with the (order-insensitive) `query` at `version` of the data and app."""
+    params = "&".join(sorted(query.split("&"))) if query else ""
+    digest = hashlib.sha1(f"{app_version}+{APP_BUILD}|{path}?{params}".encode()).hexdigest()[:16]
+    headers = {"ETag": f'"v{version}-{digest}"', "Cache-Control": "no-cache"}
+    modified = last_modified(updated_at)
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+def not_modified(request_headers, validators: Dict[str, str]) -> bool:
+    """
+    Evaluate If-None-Match, then If-Modified-Since (only when no ETag was sent),
+    against the validators of the current data version.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        sent = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in sent or validators["ETag"] in sent
+
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = validators.get("Last-Modified")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
 import os
+import time
+from typing import Iterable, Iterator, Optional
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 from models import Movie_Info, EtlMetadata, Production_Info, Rating_Info
 import pandas as pd
+from scripts.bridges import refresh_bridges
+from scripts.rollups import snapshot_contributions, rollup_deltas, apply_rollup_deltas
 
 load_dotenv()
 
@@ -17,41 +25,274 @@ DB_NAME = os.getenv("POSTGRES_DB")
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 engine = create_engine(DATABASE_URL)
 
+# Target tables in foreign-key order (movie_info first)
+LOAD_MODELS = {
+    "movie_info": Movie_Info,
+    "production_info": Production_Info,
+    "rating_info": Rating_Info,
+}
+
+# "copy" streams through COPY + staging upsert, "orm" uses bulk_insert_mappings
+LOAD_METHOD = os.getenv("LOAD_METHOD", "copy")
+COPY_BATCH_SIZE = int(os.getenv("COPY_BATCH_SIZE", "50000"))
+# Encode the COPY payloads of the three tables on worker threads while the
+# database loads the previous table (see load_scheduled)
+LOAD_PARALLEL = os.getenv("LOAD_PARALLEL", "true").lower() == "true"
+
+def coerce_integer_columns(frame: pd.DataFrame, table) -> pd.DataFrame:
+    """
+    Cast float columns mapped to Integer columns of `table` to nullable Int64.
+
+    Integer columns come in as float when they hold NaN; COPY needs "1990",
+    not "1990.0", and row fingerprints must not depend on it either.
+    """
+    int_columns = [
+        c.name for c in table.columns
+        if c.name in frame.columns and isinstance(c.type, Integer) and frame[c.name].dtype.kind == "f"
+    ]
+    if int_columns:
+        frame = frame.astype({col: "Int64" for col in int_columns})
+    return frame
+
+def orm_records(frame: pd.DataFrame, model) -> list:
+    """
+    Rows of `frame` as mappings for the ORM bulk API of `model`.
+
+    The transform hands JSONB values over as JSON text, which copy_upsert
+    writes verbatim. The JSONB bind would encode that text a second time
+    (storing a JSON string instead of the array), so it is decoded here and
+    both load methods store the same value.
+    """
+    columns = [c.name for c in model.__table__.columns if c.name in frame.columns]
+    json_columns = [c.name for c in model.__table__.columns if c.name in frame.columns and isinstance(c.type, JSONB)]
+    records = frame[columns].to_dict(orient="records")
+    for row in records:
+        for col in json_columns:
+            if isinstance(row[col], str):
+                row[col] = json.loads(row[col])
+    return records
+
+def _copy_from_buffer(cursor, sql: str, buffer: io.StringIO):
+    """Run COPY ... FROM STDIN with psycopg2 (copy_expert) or psycopg 3 (copy)."""
+    buffer.seek(0)
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+def _copy_columns(df: pd.DataFrame, model) -> tuple:
+    """Columns copy_upsert loads for `model`, and whether updated_at is stamped by the database."""
+    table = model.__table__
+    stamp = "updated_at" in table.columns and "updated_at" not in df.columns
+    return [c.name for c in table.columns if not (stamp and c.name == "updated_at")], stamp
+
+def copy_batches(df: pd.DataFrame, model, batch_size: int = COPY_BATCH_SIZE) -> Iterator[io.StringIO]:
+    """CSV buffers of `df`, `batch_size` rows each, as copy_upsert streams them into the staging table."""
+    columns, _ = _copy_columns(df, model)
+    frame = coerce_integer_columns(df[columns], model.__table__)
+    for start in range(0, len(frame), batch_size):
+        buffer = io.StringIO()
+        frame.iloc[start:start + batch_size].to_csv(buffer, index=False, header=False, na_rep="\\N")
+        yield buffer
+
+def copy_upsert(
+    df: pd.DataFrame,
+    model,
+    connection,
+    batch_size: int = COPY_BATCH_SIZE,
+    batches: Optional[Iterable[io.StringIO]] = None
+) -> int:
+    """
+    Upsert a DataFrame into the table of `model` using PostgreSQL COPY.
+
+    Rows are streamed as CSV batches (copy_batches, unless already encoded
+    `batches` are given) into a temporary (unlogged, session private)
+    staging table, then merged with
+    INSERT ... ON CONFLICT (imdb_title_id) DO UPDATE. JSONB columns are
+    expected as JSON text and cast by PostgreSQL (see orm_records for the
+    ORM loader). Tables with an
+    updated_at column the frame does not carry get it stamped with the
+    transaction time, and existing rows are only rewritten (and stamped)
+    when a value differs. Returns the number of rows inserted or updated.
+    """
+    table = model.__table__
+    columns, stamp = _copy_columns(df, model)
+    staging = f"staging_{table.name}"
+    if batches is None:
+        batches = copy_batches(df, model, batch_size)
+
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in columns if col != "imdb_title_id")
+    insert_list, select_list, changed = column_list, column_list, ""
+    if stamp:
+        data_columns = [col for col in columns if col != "imdb_title_id"]
+        insert_list += ", updated_at"
+        select_list += ", timezone('utc', now())"
+        updates += ", updated_at = EXCLUDED.updated_at"
+        changed = (
+            f"WHERE ({', '.join(f'{table.name}.{col}' for col in data_columns)}) "
+            f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{col}' for col in data_columns)})"
+        )
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+        for buffer in batches:
+            _copy_from_buffer(cursor, f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        cursor.execute(f"""
+            INSERT INTO {table.name} ({insert_list})
+            SELECT {select_list} FROM {staging}
+            ON CONFLICT (imdb_title_id) DO UPDATE SET {updates}
+            {changed}
+        """)
+        affected = cursor.rowcount
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+    return affected
+
 def load_tables(tables: dict):
     """Load transformed DataFrames into PostgreSQL."""
-    for name, df in tables.items():
-        df.to_sql(name, engine, if_exists="append", index=False)
-        print(f"✅ Loaded {len(df)} rows into {name}")
+    with engine.begin() as connection:
+        for name, model in LOAD_MODELS.items():
+            if name in tables:
+                affected = copy_upsert(tables[name], model, connection)
+                print(f"✅ Loaded {affected} rows into {name}")
+
+def get_last_loaded_date(session: Session) -> pd.Timestamp:
+    """Read the date_published watermark stored by the previous load."""
+    last_loaded = session.query(EtlMetadata).filter_by(key="last_date").first()
+    return pd.to_datetime(last_loaded.value) if last_loaded else pd.Timestamp.min
+
+def set_last_loaded_date(session: Session, max_date) -> None:
+    """Store the date_published watermark for the next load."""
+    last_loaded = session.query(EtlMetadata).filter_by(key="last_date").first()
+    if last_loaded:
+        last_loaded.value = str(max_date.date())
+    else:
+        session.add(EtlMetadata(key="last_date", value=str(max_date.date())))
 
-def load_incremental(tables: dict, session: Session):
+def _timed_copy(df: pd.DataFrame, model, connection, timings: dict, batches: Optional[list] = None):
+    """copy_upsert one table and add its duration to `timings`."""
+    start = time.time()
+    copy_upsert(df, model, connection, batches=batches)
+    name = model.__tablename__
+    timings[name] = timings.get(name, 0.0) + (time.time() - start)
 
+    # People/country/language bridges follow production_info in the same transaction
+    if model is Production_Info:
+        start = time.time()
+        refresh_bridges(connection, df["imdb_title_id"])
+        timings["bridges"] = timings.get("bridges", 0.0) + (time.time() - start)
+
+def _timed_rollups(connection, deltas: dict, timings: dict):
+    """Apply rollup deltas on `connection` and add the duration to `timings`."""
+    start = time.time()
+    apply_rollup_deltas(connection, deltas)
+    timings["rollups"] = timings.get("rollups", 0.0) + (time.time() - start)
+
+def _encode_batches(df: pd.DataFrame, model) -> tuple:
+    """Worker task: every CSV batch of one table and the seconds spent encoding them."""
+    start = time.time()
+    return list(copy_batches(df, model)), time.time() - start
+
+def load_scheduled(df: pd.DataFrame, connection, timings: dict = None, deltas: dict = None) -> dict:
+    """
+    Load the three tables on `connection`, in its transaction, following
+    their foreign-key dependencies.
+
+    The CSV payloads of all three tables are encoded on worker threads from
+    the start, while the database runs the COPY, upsert and bridge
+    statements of the tables before them (movie_info, then production_info,
+    then rating_info, then the rollup `deltas`). Every statement uses the
+    one connection, so the load commits or rolls back as a whole with the
+    caller's transaction. Workers only return their batches and durations;
+    `timings` is updated by the calling thread.
+    """
+    timings = {} if timings is None else timings
+
+    with ThreadPoolExecutor(max_workers=len(LOAD_MODELS)) as pool:
+        encoded = {name: pool.submit(_encode_batches, df, model) for name, model in LOAD_MODELS.items()}
+        for name, model in LOAD_MODELS.items():
+            batches, seconds = encoded[name].result()
+            timings[f"{name}_encode"] = timings.get(f"{name}_encode", 0.0) + seconds
+            _timed_copy(df, model, connection, timings, batches)
+    if deltas:
+        _timed_rollups(connection, deltas, timings)
+    return timings
+
+def load_incremental(
+    tables: dict,
+    session: Session,
+    last_date=None,
+    update_metadata: bool = True,
+    timings: dict = None
+):
+    """
+    Load the rows published after the stored watermark.
+
+    Streaming runs read the watermark once, pass it as `last_date` for every
+    chunk with `update_metadata=False` and store the new one at the end.
+    Per-table load durations are accumulated into `timings` when given.
+    Returns the most recent date_published loaded (or None).
+    """
     df_full = tables["full"]
     # Leer último año cargado
-    last_loaded = session.query(EtlMetadata).filter_by(key="last_date").first()
-    last_date = pd.to_datetime(last_loaded.value) if last_loaded else pd.Timestamp.min
+    if last_date is None:
+        last_date = get_last_loaded_date(session)
 
     # Filtrar solo nuevos
     new_df = df_full[df_full["date_published"] > last_date]
 
     if new_df.empty:
         print("⚠️ No new data to load.")
-        return
-
-    # Prepare mappings for batch insert
-    movies_data = new_df[["imdb_title_id", "title", "year", "duration", "description"]].to_dict(orient="records")
-    prod_data = new_df[["imdb_title_id", "director", "writer", "production_company", "actors", "country", "language"]].to_dict(orient="records")
-    rating_data = new_df[["imdb_title_id", "avg_vote", "votes", "reviews_from_users", "reviews_from_critics"]].to_dict(orient="records")
+        return None
 
-    # Bulk insert
-    session.bulk_insert_mappings(Movie_Info, movies_data)
-    session.bulk_insert_mappings(Production_Info, prod_data)
-    session.bulk_insert_mappings(Rating_Info, rating_data)
+    write_rows(new_df, session, timings)
     
+    # Get the most recent date from the new batch
+    max_date = new_df["date_published"].max()
+
     # Update metadata
-    if not new_df.empty:
-        # Get the most recent date from the new batch
-        max_date = new_df["date_published"].max()
-        if last_loaded:
-            last_loaded.value = str(max_date.date())
-        else:
-            session.add(EtlMetadata(key="last_date", value=str(max_date.date())))
\ No newline at end of file
+    if update_metadata:
+        set_last_loaded_date(session, max_date)
+
+    return max_date
+
+def write_rows(df: pd.DataFrame, session: Session, timings: dict = None):
+    """
+    Write transformed rows to the three tables with the configured LOAD_METHOD.
+
+    The rollups change by the difference between the stored version of
+    these rows and the new one, applied in the same transaction as the
+    rows, so their cost follows the batch size rather than the table size.
+
+    Every row is written in the session transaction and commits (or rolls
+    back) with it; with LOAD_PARALLEL the COPY loader encodes the tables on
+    worker threads (load_scheduled).
+    """
+    timings = {} if timings is None else timings
+
+    start = time.time()
+    deltas = rollup_deltas(snapshot_contributions(session.connection(), df["imdb_title_id"]), df)
+    timings["rollups"] = timings.get("rollups", 0.0) + (time.time() - start)
+
+    if LOAD_METHOD == "copy" and LOAD_PARALLEL:
+        load_scheduled(df, session.connection(), timings, deltas)
+    elif LOAD_METHOD == "copy":
+        connection = session.connection()
+        for model in LOAD_MODELS.values():
+            _timed_copy(df, model, connection, timings)
+        _timed_rollups(connection, deltas, timings)
+    else:
+        start = time.time()
+        _bulk_insert(df, session)
+        timings["bulk_insert"] = timings.get("bulk_insert", 0.0) + (time.time() - start)
+        _timed_rollups(session.connection(), deltas, timings)
+
+def _bulk_insert(new_df: pd.DataFrame, session: Session):
+    """Insert through the ORM bulk API (fails on keys that already exist)."""
+    for model in LOAD_MODELS.values():
+        session.bulk_insert_mappings(model, orm_records(new_df, model))
+    refresh_bridges(session.connection(), new_df["imdb_title_id"])
@@ -0,0 +1,128 @@
+import json
+import os
+from typing import Any, Dict, List
+
+# Titles sampled per duration bucket in /mongo/aggregations (the most voted ones)
+MONGO_SAMPLE_SIZE = int(os.getenv("MONGO_SAMPLE_SIZE", "3"))
+
+# Accumulators that grow with the number of grouped documents; the bounded
+# $firstN/$lastN/$topN/$bottomN/$minN/$maxN take an explicit n instead
+UNBOUNDED_ACCUMULATORS = ("$push", "$addToSet")
+
+# /mongo/stats and /mongo/aggregations each read the collection once: every
+# statistic is a branch of a single $facet stage over the same scan
+STATS_PIPELINE = [
+    {"$facet": {
+        "total": [{"$count": "count"}],
+        "movies_by_year": [
+            {"$match": {"year": {"$ne": None}}},
+            {"$group": {"_id": "$year", "count": {"$sum": 1}}},
+            {"$sort": {"_id": -1}},
+            {"$limit": 10}
+        ],
+        "top_rated": [
+            {"$match": {"avg_vote": {"$ne": None}}},
+            {"$sort": {"avg_vote": -1}},
+            {"$limit": 10},
+            {"$project": {"title": 1, "year": 1, "avg_vote": 1, "_id": 0}}
+        ],
+        "average_rating": [
+            {"$match": {"avg_vote": {"$ne": None}}},
+            {"$group": {"_id": None, "avg_rating": {"$avg": "$avg_vote"}}}
+        ]
+    }}
+]
+
+DURATION_BOUNDARIES = [0, 60, 90, 120, 150, 180, 300]
+
+AGGREGATIONS_PIPELINE = [
+    {"$facet": {
+        "top_directors": [
+            {"$match": {"director": {"$ne": None}}},
+            {"$group": {"_id": "$director", "movie_count": {"$sum": 1}, "avg_rating": {"$avg": "$avg_vote"}}},
+            {"$sort": {"movie_count": -1}},
+            {"$limit": 10}
+        ],
+        "movies_by_duration": [
+            {"$match": {"duration": {"$ne": None}}},
+            {"$bucket": {
+                "groupBy": "$duration",
+                "boundaries": DURATION_BOUNDARIES,
+                "default": "300+",
+                "output": {
+                    "count": {"$sum": 1},
+                    "titles": {"$topN": {"n": MONGO_SAMPLE_SIZE, "sortBy": {"votes": -1}, "output": "$title"}}
+                }
+            }}
+        ]
+    }}
+]
+
+def _director_label(value) -> str:
+    """Directors are stored as a list of names (JSON text in older loads); show them as plain names."""
+    if isinstance(value, str) and (value.startswith('"') or value.startswith('[')):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if isinstance(value, list):
+        value = ", ".join(value)
+    return value
+
+def format_stats(facets: Dict[str, List[dict]]) -> Dict[str, Any]:
+    """Shape the $facet document of STATS_PIPELINE as the /mongo/stats response."""
+    total = facets["total"][0]["count"] if facets["total"] else 0
+    average = facets["average_rating"][0]["avg_rating"] if facets["average_rating"] else 0
+    return {
+        "total_movies": total,
+        "average_rating": round(average, 2),
+        "movies_by_year": [{"year": doc["_id"], "count": doc["count"]} for doc in facets["movies_by_year"]],
+        "top_rated_movies": facets["top_rated"]
+    }
+
+def format_aggregations(facets: Dict[str, List[dict]]) -> Dict[str, Any]:
+    """Shape the $facet document of AGGREGATIONS_PIPELINE as the /mongo/aggregations response."""
+    return {
+        "top_directors": [
+            {
+                "director": _director_label(doc["_id"]),
+                "movie_count": doc["movie_count"],
+                "avg_rating": round(doc["avg_rating"], 2) if doc["avg_rating"] else None
+            }
+            for doc in facets["top_directors"]
+        ],
+        "movies_by_duration": [
+            {
+                "range": f"{doc['_id']}-{doc['_id'] + 30} min" if doc["_id"] != "300+" else "300+ min",
+                "count": doc["count"],
+                "sample_titles": doc["titles"]
+            }
+            for doc in facets["movies_by_duration"]
+        ]
+    }
+
+def unbounded_accumulators(stage: Any, path: str = "") -> List[str]:
+    """Paths of every $push/$addToSet in a pipeline (or any part of one)."""
+    found = []
+    if isinstance(stage, dict):
+        for key, value in stage.items():
+            if key in UNBOUNDED_ACCUMULATORS:
+                found.append(f"{path}.{key}".lstrip("."))
+            found.extend(unbounded_accumulators(value, f"{path}.{key}"))
+    elif isinstance(stage, list):
+        for index, value in enumerate(stage):
+            found.extend(unbounded_accumulators(value, f"{path}[{index}]"))
+    return found
+
+def ensure_bounded(pipeline: List[dict]) -> None:
+    """Refuse pipelines that would materialize arrays as large as the collection."""
+    found = unbounded_accumulators(pipeline)
+    if found:
+        raise ValueError(f"Unbounded array accumulators in aggregation pipeline: {', '.join(found)}")
+
+async def run_facet_async(collection, pipeline: List[dict]) -> Dict[str, List[dict]]:
+    """Run a single-$facet pipeline and return its only document."""
+    ensure_bounded(pipeline)
+    async for facets in collection.aggregate(pipeline):
+        return facets
+    return {name: [] for name in pipeline[-1]["$facet"]}
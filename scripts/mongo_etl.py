@@ -11,9 +11,11 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.extract import extract_movies
-from scripts.transform import transform_movies
+from scripts.transform import transform_movies, decode_json_arrays, LIST_COLUMNS
 from scripts.validate import validate_movies
 from scripts.monitor import log_event
+from scripts.mongo_search import TITLE_KEY_FIELD
+from scripts.mongo_load import load_documents, MONGO_LOAD_MODE, MONGO_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -28,53 +30,64 @@ def format_duration(seconds):
         secs = seconds % 60
         return f"{minutes}m {secs:.2f}s"
 
+def _column_to_bson(column: pd.Series) -> np.ndarray:
+    """
+    Convert one column to an object array of BSON-ready Python values.
+
+    Datetimes become ISO strings, NaN/NaT/inf become None and numpy
+    scalars become native int/float, all without a per-value Python call.
+    """
+    if pd.api.types.is_datetime64_any_dtype(column):
+        missing = column.isna().to_numpy()
+        values = column.dt.strftime("%Y-%m-%dT%H:%M:%S").to_numpy(dtype=object, copy=True)
+        values[missing] = None
+        return values
+
+    values = column.to_numpy(dtype=object, na_value=None, copy=True)
+    if pd.api.types.is_float_dtype(column):
+        values[~np.isfinite(column.to_numpy(dtype="float64", na_value=np.nan))] = None
+    return values
+
+def iter_mongo_documents(df: pd.DataFrame, batch_size: int = MONGO_BATCH_SIZE):
+    """
+    Lazily yield BSON-ready documents from a DataFrame.
+
+    Rows are converted column-wise one batch at a time, so only a batch of
+    documents exists at once and the DataFrame itself is never copied.
+    List columns (JSON text from the transform) are split back into arrays
+    and the casefolded title_lower search key is added, as in the documents
+    synced from PostgreSQL.
+    """
+    columns = list(df.columns)
+    keyed = "title" in columns
+    names = columns + [TITLE_KEY_FIELD] if keyed else columns
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        values = [
+            decode_json_arrays(batch[col]).to_numpy(dtype=object) if col in LIST_COLUMNS else _column_to_bson(batch[col])
+            for col in columns
+        ]
+        if keyed:
+            # Same key as title_key(), one str.casefold pass per batch
+            values.append(batch["title"].str.casefold().to_numpy(dtype=object, na_value=None))
+        for row in zip(*values):
+            yield dict(zip(names, row))
+
 def clean_data_for_mongodb(df):
     """
     Clean DataFrame for MongoDB insertion
     Handles NaT, NaN, and other problematic values
     """
-    # Create a copy to avoid modifying original
-    df_clean = df.copy()
-    
-    # Handle datetime columns - convert NaT to None
-    datetime_cols = df_clean.select_dtypes(include=['datetime64']).columns
-    for col in datetime_cols:
-        df_clean[col] = df_clean[col].apply(lambda x: None if pd.isna(x) else x.isoformat())
-    
-    # Handle object columns that might contain datetime objects
-    object_cols = df_clean.select_dtypes(include=['object']).columns
-    for col in object_cols:
-        df_clean[col] = df_clean[col].apply(lambda x: None if pd.isna(x) else x)
-    
-    # Handle numeric columns - convert NaN to None
-    numeric_cols = df_clean.select_dtypes(include=[np.number]).columns
-    for col in numeric_cols:
-        df_clean[col] = df_clean[col].replace([np.inf, -np.inf, np.nan], None)
-    
-    # Convert to dict and then to JSON and back to ensure serialization
-    records = df_clean.to_dict('records')
-    
-    # Clean each record
-    cleaned_records = []
-    for record in records:
-        cleaned_record = {}
-        for key, value in record.items():
-            if pd.isna(value) or value is pd.NaT:
-                cleaned_record[key] = None
-            elif isinstance(value, (np.int64, np.int32)):
-                cleaned_record[key] = int(value)
-            elif isinstance(value, (np.float64, np.float32)):
-                cleaned_record[key] = float(value) if not np.isnan(value) else None
-            else:
-                cleaned_record[key] = value
-        cleaned_records.append(cleaned_record)
-    
-    return pd.DataFrame(cleaned_records)
+    return pd.DataFrame(list(iter_mongo_documents(df)), columns=df.columns)
 
-def run_mongo_etl():
+def run_mongo_etl(mode: str = None):
     """
     Execute ETL pipeline specifically for MongoDB with timing metrics
+
+    `mode` selects how documents are written (see scripts/mongo_load.py),
+    MONGO_LOAD_MODE by default.
     """
+    mode = mode or MONGO_LOAD_MODE
     total_start = time.time()
     
     try:
@@ -156,48 +169,23 @@ def run_mongo_etl():
         print("-"*50)
         load_start = time.time()
         
-        # Convert DataFrame to documents
-        print("  Converting data to MongoDB format...")
-        conversion_start = time.time()
-        
-        # CLEAN DATA BEFORE CONVERSION
-        cleaned_df = clean_data_for_mongodb(tables["full"])
-        movies_data = cleaned_df.to_dict('records')
-        
-        conversion_time = time.time() - conversion_start
-        print(f"    Conversion time: {format_duration(conversion_time)}")
-        
-        # Clear existing data
-        print("  Clearing existing data...")
-        delete_start = time.time()
-        delete_result = movies_collection.delete_many({})
-        delete_time = time.time() - delete_start
-        print(f"    Deleted {delete_result.deleted_count} documents")
-        print(f"    Time: {format_duration(delete_time)}")
-        
-        # Insert new data
-        print("  Inserting new data...")
-        insert_start = time.time()
-        if movies_data:
-            insert_result = movies_collection.insert_many(movies_data)
-            insert_time = time.time() - insert_start
-            print(f"    Inserted {len(insert_result.inserted_ids)} documents")
-            print(f"    Time: {format_duration(insert_time)}")
-            print(f"    Throughput: {len(movies_data)/insert_time:.0f} documents/second")
-        else:
-            insert_time = 0
-            print(f"    No data to insert")
-        
-        # Create indexes
-        print("  Creating indexes...")
-        index_start = time.time()
-        movies_collection.create_index("title")
-        movies_collection.create_index("release_year")
-        movies_collection.create_index("imdb_rating")
-        movies_collection.create_index([("genre", 1), ("release_year", -1)])
-        index_time = time.time() - index_start
-        print(f"    Indexes created: 4")
-        print(f"    Time: {format_duration(index_time)}")
+        # Documents are converted lazily, one batch at a time, while they are written
+        movies_data = iter_mongo_documents(tables["full"])
+        document_count = len(tables["full"])
+        
+        # Write documents without emptying the live collection
+        print(f"  Converting and writing documents (mode: {mode})...")
+        write_start = time.time()
+        write_result = load_documents(db, movies_data, mode=mode)
+        write_time = time.time() - write_start
+        print(f"    Inserted: {write_result['inserted']} | Updated: {write_result['updated']} | "
+              f"Unchanged: {write_result['unchanged']} | Deleted: {write_result['deleted']}")
+        indexes = write_result["indexes"]
+        print(f"    Indexes created: {len(indexes['created'])} | dropped: {len(indexes['dropped'])} | "
+              f"kept: {len(indexes['kept'])}")
+        print(f"    Time: {format_duration(write_time)}")
+        if document_count:
+            print(f"    Throughput: {document_count/write_time:.0f} documents/second")
         
         load_time = time.time() - load_start
         print(f"  Total load time: {format_duration(load_time)}")
@@ -209,7 +197,7 @@ def run_mongo_etl():
         verify_start = time.time()
         
         mongo_count = movies_collection.count_documents({})
-        expected_count = len(cleaned_df)
+        expected_count = document_count
         
         verify_time = time.time() - verify_start
         
@@ -233,15 +221,15 @@ def run_mongo_etl():
         # Test query 1
         query1_start = time.time()
         top_movies = list(movies_collection.find(
-            {"imdb_rating": {"$gte": 8.0}}, 
-            {"title": 1, "imdb_rating": 1}
+            {"avg_vote": {"$gte": 8.0}}, 
+            {"title": 1, "avg_vote": 1}
         ).limit(10))
         query1_time = time.time() - query1_start
         print(f"  Query 1 (Top rated): {len(top_movies)} results in {format_duration(query1_time)}")
         
         # Test query 2
         query2_start = time.time()
-        recent_count = movies_collection.count_documents({"release_year": {"$gte": 2020}})
+        recent_count = movies_collection.count_documents({"year": {"$gte": 2020}})
         query2_time = time.time() - query2_start
         print(f"  Query 2 (Recent movies): {recent_count} results in {format_duration(query2_time)}")
         
@@ -273,6 +261,8 @@ def run_mongo_etl():
         return {
             'status': 'success',
             'records_loaded': mongo_count,
+            'load_mode': mode,
+            'changes': write_result,
             'execution_time': total_time
         }
         
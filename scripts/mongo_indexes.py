@@ -0,0 +1,183 @@
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+# Index set of the movies collection, derived from the /mongo/* queries in app.py
+MOVIES_INDEXES = [
+    # Upserts and lookups by id
+    IndexModel([("imdb_title_id", ASCENDING)], name="imdb_title_id_unique", unique=True),
+    # /mongo/movies sorted by title (keyset on title, imdb_title_id)
+    IndexModel([("title", ASCENDING), ("imdb_title_id", ASCENDING)], name="title_1_imdb_title_id_1"),
+    # /mongo/search short q: anchored case-sensitive regex on the casefolded title
+    IndexModel([("title_lower", ASCENDING)], name="title_lower_1"),
+    # /mongo/search year range + min_rating
+    IndexModel([("year", DESCENDING), ("avg_vote", DESCENDING)], name="year_-1_avg_vote_-1"),
+    # /mongo/search min_rating
+    IndexModel([("avg_vote", DESCENDING), ("votes", DESCENDING)], name="avg_vote_-1_votes_-1"),
+    # /mongo/movies keyset pages: (sort key, imdb_title_id), walked in either direction
+    IndexModel([("year", DESCENDING), ("imdb_title_id", DESCENDING)], name="year_-1_imdb_title_id_-1"),
+    IndexModel([("avg_vote", DESCENDING), ("imdb_title_id", DESCENDING)], name="avg_vote_-1_imdb_title_id_-1"),
+    IndexModel([("votes", DESCENDING), ("imdb_title_id", DESCENDING)], name="votes_-1_imdb_title_id_-1"),
+    # /mongo/search?director=
+    IndexModel([("director", ASCENDING), ("avg_vote", DESCENDING)], name="director_1_avg_vote_-1"),
+    # /mongo/search?country= with a year range
+    IndexModel([("country", ASCENDING), ("year", DESCENDING)], name="country_1_year_-1"),
+    # /mongo/movies sorted by duration
+    IndexModel([("duration", ASCENDING), ("imdb_title_id", ASCENDING)], name="duration_1_imdb_title_id_1"),
+    # /mongo/search?q= relevance search. Documents carry a "language" field with values
+    # such as "English, Spanish", so the per-document language override is pointed elsewhere
+    IndexModel(
+        [("title", TEXT), ("director", TEXT), ("description", TEXT)],
+        name="movies_text",
+        weights={"title": 10, "director": 5, "description": 1},
+        default_language="english",
+        language_override="text_language"
+    ),
+]
+
+# Representative filter and sort of every /mongo/* query, used by the explain() check
+ENDPOINT_QUERIES = {
+    "/mongo/movies (sort_by=year)": (
+        {"$or": [{"year": {"$lt": 2000}}, {"year": 2000, "imdb_title_id": {"$lt": "tt0100000"}}]},
+        [("year", DESCENDING), ("imdb_title_id", DESCENDING)]
+    ),
+    "/mongo/movies (sort_by=avg_vote)": (
+        {"$or": [{"avg_vote": {"$lt": 7.5}}, {"avg_vote": 7.5, "imdb_title_id": {"$lt": "tt0100000"}}]},
+        [("avg_vote", DESCENDING), ("imdb_title_id", DESCENDING)]
+    ),
+    "/mongo/movies (sort_by=title)": (
+        {"$or": [{"title": {"$gt": "M"}}, {"title": "M", "imdb_title_id": {"$gt": "tt0100000"}}]},
+        [("title", ASCENDING), ("imdb_title_id", ASCENDING)]
+    ),
+    "/mongo/movies (NULL sort keys)": ({"year": None, "imdb_title_id": {"$lt": "tt0100000"}}, [("imdb_title_id", DESCENDING)]),
+    "/mongo/search (q, text)": ({"$text": {"$search": "love"}}, None),
+    "/mongo/search (q, short prefix)": ({"title_lower": {"$regex": "^lo"}}, [("title_lower", ASCENDING)]),
+    "/mongo/search (title)": ({"title": {"$regex": "love", "$options": "i"}}, None),
+    "/mongo/search (director)": ({"director": {"$regex": "nolan", "$options": "i"}}, None),
+    "/mongo/search (country + years)": ({"country": {"$regex": "USA"}, "year": {"$gte": 2000, "$lte": 2010}}, None),
+    "/mongo/search (years + rating)": ({"year": {"$gte": 2000, "$lte": 2010}, "avg_vote": {"$gte": 7}}, None),
+}
+# /mongo/stats and /mongo/aggregations are single $facet passes (scripts/mongo_aggregations.py):
+# they read every document once by design, so they are not part of the coverage check
+
+def _key_spec(keys) -> List[tuple]:
+    """
+    Comparable (field, direction) pairs. Numeric directions may come back as
+    1.0 from the server; "text", "2dsphere", "hashed"... are compared as is.
+    """
+    return [
+        (field, float(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in keys
+    ]
+
+def _same_definition(info: dict, model: IndexModel) -> bool:
+    """Whether an existing index (index_information() entry) matches a declared model."""
+    document = model.document
+    if bool(info.get("unique")) != bool(document.get("unique")):
+        return False
+    if TEXT in document["key"].values():
+        # Text indexes are stored as _fts/_ftsx keys; the fields live in "weights"
+        weights = document.get("weights") or {field: 1 for field in document["key"]}
+        return (info.get("weights") == weights
+                and info.get("default_language", "english") == document.get("default_language", "english")
+                and info.get("language_override", "language") == document.get("language_override", "language"))
+    return _key_spec(info["key"]) == _key_spec(document["key"].items())
+
+def _plan_reconcile(existing: Dict[str, dict]) -> dict:
+    """Compare index_information() with MOVIES_INDEXES; returns names to drop and models to create."""
+    declared = {model.document["name"]: model for model in MOVIES_INDEXES}
+    drop, create, kept = [], [], []
+
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        model = declared.get(name)
+        if model is None:
+            drop.append(name)
+        elif not _same_definition(info, model):
+            # Same name, different definition: rebuild it
+            drop.append(name)
+            create.append(model)
+        else:
+            kept.append(name)
+
+    create.extend(model for name, model in declared.items() if name not in existing)
+    return {"drop": drop, "create": create, "kept": kept}
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Every stage name in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+def _coverage_entry(explain: dict) -> dict:
+    stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    return {
+        "covered": "COLLSCAN" not in stages and any(stage in ("IXSCAN", "EXPRESS_IXSCAN") for stage in stages),
+        "stages": stages
+    }
+
+# ============= Synchronous (pymongo) =============
+
+def create_declared_indexes(collection) -> dict:
+    """Build every declared index (used on fresh shadow collections)."""
+    collection.create_indexes(MOVIES_INDEXES)
+    return {"created": [model.document["name"] for model in MOVIES_INDEXES], "dropped": [], "kept": []}
+
+def reconcile_indexes(collection) -> dict:
+    """Create missing declared indexes and drop stale or changed ones."""
+    plan = _plan_reconcile(collection.index_information())
+    for name in plan["drop"]:
+        collection.drop_index(name)
+    if plan["create"]:
+        collection.create_indexes(plan["create"])
+    return {
+        "created": [model.document["name"] for model in plan["create"]],
+        "dropped": plan["drop"],
+        "kept": plan["kept"]
+    }
+
+def check_index_coverage(collection) -> dict:
+    """Run explain() on each endpoint query and report whether an index serves it."""
+    report = {}
+    for endpoint, (query, sort) in ENDPOINT_QUERIES.items():
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        report[endpoint] = _coverage_entry(cursor.explain())
+    return report
+
+# ============= Asynchronous (motor) =============
+
+async def create_declared_indexes_async(collection) -> dict:
+    await collection.create_indexes(MOVIES_INDEXES)
+    return {"created": [model.document["name"] for model in MOVIES_INDEXES], "dropped": [], "kept": []}
+
+async def reconcile_indexes_async(collection) -> dict:
+    """Async counterpart of reconcile_indexes, run on API startup and after /mongo/sync."""
+    plan = _plan_reconcile(await collection.index_information())
+    for name in plan["drop"]:
+        await collection.drop_index(name)
+    if plan["create"]:
+        await collection.create_indexes(plan["create"])
+    return {
+        "created": [model.document["name"] for model in plan["create"]],
+        "dropped": plan["drop"],
+        "kept": plan["kept"]
+    }
+
+async def check_index_coverage_async(collection) -> dict:
+    """Async counterpart of check_index_coverage."""
+    report = {}
+    for endpoint, (query, sort) in ENDPOINT_QUERIES.items():
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        report[endpoint] = _coverage_entry(await cursor.explain())
+    return report
@@ -0,0 +1,194 @@
+import asyncio
+import contextlib
+import os
+import sys
+from itertools import islice
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Union
+from bson import ObjectId
+from pymongo import ReplaceOne
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.mongo_indexes import (
+    create_declared_indexes, reconcile_indexes,
+    create_declared_indexes_async, reconcile_indexes_async
+)
+
+# "upsert": unordered bulk upserts keyed on imdb_title_id, stamped with the run's load_gen
+# "swap":   build a shadow collection with its indexes and rename it over the live one
+# "replace": previous behaviour, delete_many({}) followed by insert_many
+MONGO_LOAD_MODE = os.getenv("MONGO_LOAD_MODE", "upsert")
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "5000"))
+# Stamped by every upsert run on the documents it writes; titles left with an older
+# generation were not in the load and are deleted without holding the loaded ids
+LOAD_GEN_FIELD = "load_gen"
+
+# What the async loaders accept: documents, or already batched documents from an async source
+Documents = Union[Iterable[dict], AsyncIterable[List[dict]]]
+
+def _batches(documents: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Split any iterable of documents into lists of at most `size`."""
+    iterator = iter(documents)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+async def _read_ahead(documents: Documents, size: int) -> AsyncIterator[List[dict]]:
+    """
+    Batches for the async loaders: `documents` is an iterable of documents or
+    an async iterable of ready batches (e.g. a database cursor). The next
+    batch is fetched while the caller is writing the current one.
+    """
+    if not hasattr(documents, "__aiter__"):
+        for batch in _batches(documents, size):
+            yield batch
+        return
+
+    batches = documents.__aiter__()
+    pending = asyncio.ensure_future(batches.__anext__())
+    try:
+        while True:
+            try:
+                batch = await pending
+            except StopAsyncIteration:
+                return
+            pending = asyncio.ensure_future(batches.__anext__())
+            yield batch
+    finally:
+        # The writer failed or stopped early: release the source (and its cursor)
+        if not pending.done():
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+        if hasattr(batches, "aclose"):
+            await batches.aclose()
+
+def _upsert_requests(batch: List[dict], load_gen: ObjectId) -> List[ReplaceOne]:
+    return [
+        ReplaceOne({"imdb_title_id": doc["imdb_title_id"]}, {**doc, LOAD_GEN_FIELD: load_gen}, upsert=True)
+        for doc in batch
+    ]
+
+def _empty_result(mode: str) -> dict:
+    return {"mode": mode, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+# ============= Synchronous (pymongo) =============
+
+def upsert_documents(collection, documents: Iterable[dict], batch_size: int = MONGO_BATCH_SIZE) -> dict:
+    """
+    Upsert documents by imdb_title_id with unordered bulk writes.
+
+    Readers keep seeing the full collection during the load. Every written
+    document carries the run's load_gen, so titles missing from `documents`
+    are deleted at the end by generation, in constant memory. (The stamp
+    rewrites each matched document: "unchanged" only counts documents
+    written twice in the same run.)
+    """
+    result = _empty_result("upsert")
+    load_gen = ObjectId()
+    result["indexes"] = reconcile_indexes(collection)
+
+    for batch in _batches(documents, batch_size):
+        write = collection.bulk_write(_upsert_requests(batch, load_gen), ordered=False)
+        result["inserted"] += write.upserted_count
+        result["updated"] += write.modified_count
+        result["unchanged"] += write.matched_count - write.modified_count
+
+    result["deleted"] = collection.delete_many({LOAD_GEN_FIELD: {"$ne": load_gen}}).deleted_count
+    return result
+
+def swap_documents(db, documents: Iterable[dict], name: str = "movies", batch_size: int = MONGO_BATCH_SIZE) -> dict:
+    """
+    Load into `<name>_shadow`, build its indexes and atomically rename it to `name`.
+
+    Readers see the old collection until renameCollection replaces it.
+    """
+    result = _empty_result("swap")
+    shadow = db[f"{name}_shadow"]
+    shadow.drop()
+    result["indexes"] = create_declared_indexes(shadow)
+
+    for batch in _batches(documents, batch_size):
+        result["inserted"] += len(shadow.insert_many(batch, ordered=False).inserted_ids)
+
+    shadow.rename(name, dropTarget=True)
+    return result
+
+def replace_documents(collection, documents: Iterable[dict], batch_size: int = MONGO_BATCH_SIZE) -> dict:
+    """Delete every document and insert the new ones (collection is empty meanwhile)."""
+    result = _empty_result("replace")
+    result["deleted"] = collection.delete_many({}).deleted_count
+    for batch in _batches(documents, batch_size):
+        result["inserted"] += len(collection.insert_many(batch).inserted_ids)
+    result["indexes"] = reconcile_indexes(collection)
+    return result
+
+def load_documents(db, documents: Iterable[dict], mode: str = MONGO_LOAD_MODE, name: str = "movies") -> dict:
+    """Load documents into `db[name]` with the given MONGO_LOAD_MODE."""
+    if mode == "upsert":
+        return upsert_documents(db[name], documents)
+    if mode == "swap":
+        return swap_documents(db, documents, name)
+    if mode == "replace":
+        return replace_documents(db[name], documents)
+    raise ValueError(f"Unknown MongoDB load mode: {mode}")
+
+# ============= Asynchronous (motor) =============
+
+async def upsert_documents_async(
+    collection,
+    documents: Documents,
+    batch_size: int = MONGO_BATCH_SIZE,
+    delete_missing: bool = True
+) -> dict:
+    """Async counterpart of upsert_documents; delete_missing=False keeps titles absent from `documents`."""
+    result = _empty_result("upsert")
+    load_gen = ObjectId()
+    result["indexes"] = await reconcile_indexes_async(collection)
+
+    async for batch in _read_ahead(documents, batch_size):
+        write = await collection.bulk_write(_upsert_requests(batch, load_gen), ordered=False)
+        result["inserted"] += write.upserted_count
+        result["updated"] += write.modified_count
+        result["unchanged"] += write.matched_count - write.modified_count
+
+    if delete_missing:
+        deleted = await collection.delete_many({LOAD_GEN_FIELD: {"$ne": load_gen}})
+        result["deleted"] = deleted.deleted_count
+    return result
+
+async def swap_documents_async(db, documents: Documents, name: str = "movies", batch_size: int = MONGO_BATCH_SIZE) -> dict:
+    """Async counterpart of swap_documents."""
+    result = _empty_result("swap")
+    shadow = db[f"{name}_shadow"]
+    await shadow.drop()
+    result["indexes"] = await create_declared_indexes_async(shadow)
+
+    async for batch in _read_ahead(documents, batch_size):
+        inserted = await shadow.insert_many(batch, ordered=False)
+        result["inserted"] += len(inserted.inserted_ids)
+
+    await shadow.rename(name, dropTarget=True)
+    return result
+
+async def replace_documents_async(collection, documents: Documents, batch_size: int = MONGO_BATCH_SIZE) -> dict:
+    """Async counterpart of replace_documents."""
+    result = _empty_result("replace")
+    deleted = await collection.delete_many({})
+    result["deleted"] = deleted.deleted_count
+    async for batch in _read_ahead(documents, batch_size):
+        inserted = await collection.insert_many(batch)
+        result["inserted"] += len(inserted.inserted_ids)
+    result["indexes"] = await reconcile_indexes_async(collection)
+    return result
+
+async def load_documents_async(db, documents: Documents, mode: str = MONGO_LOAD_MODE, name: str = "movies") -> dict:
+    """Async counterpart of load_documents, for the motor client used by the API."""
+    if mode == "upsert":
+        return await upsert_documents_async(db[name], documents)
+    if mode == "swap":
+        return await swap_documents_async(db, documents, name)
+    if mode == "replace":
+        return await replace_documents_async(db[name], documents)
+    raise ValueError(f"Unknown MongoDB load mode: {mode}")
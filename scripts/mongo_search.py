@@ -0,0 +1,97 @@
+import os
+import re
+from typing import Optional
+from pymongo import UpdateOne
+
+# Queries shorter than this are matched as a title prefix: the text index works on
+# whole (stemmed) words, so "lo" would never match "Love" while the user is typing
+MONGO_TEXT_MIN_LENGTH = int(os.getenv("MONGO_TEXT_MIN_LENGTH", "3"))
+# /mongo/search counts matches up to this many ("total_capped" when reached)
+MONGO_SEARCH_COUNT_LIMIT = int(os.getenv("MONGO_SEARCH_COUNT_LIMIT", "1000"))
+
+# Casefolded copy of the title stored in every document. A case-sensitive anchored
+# regex on it gets tight bounds on title_lower_1; a case-insensitive regex on "title"
+# has to scan the whole index
+TITLE_KEY_FIELD = "title_lower"
+
+def title_key(title) -> Optional[str]:
+    return title.casefold() if isinstance(title, str) else None
+
+async def backfill_title_keys_async(collection, batch_size: int = 1000) -> int:
+    """Add title_lower to documents loaded before it existed; returns how many were updated."""
+    updated = 0
+    requests = []
+    async for document in collection.find({TITLE_KEY_FIELD: {"$exists": False}}, {"title": 1}):
+        requests.append(UpdateOne({"_id": document["_id"]}, {"$set": {TITLE_KEY_FIELD: title_key(document.get("title"))}}))
+        if len(requests) == batch_size:
+            updated += (await collection.bulk_write(requests, ordered=False)).modified_count
+            requests = []
+    if requests:
+        updated += (await collection.bulk_write(requests, ordered=False)).modified_count
+    return updated
+
+def build_search_filter(
+    q: Optional[str] = None,
+    mode: str = "text",
+    title: Optional[str] = None,
+    director: Optional[str] = None,
+    country: Optional[str] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    min_rating: Optional[float] = None
+) -> dict:
+    """
+    Build the /mongo/search filter.
+
+    Returns the filter, the projection/sort to apply and the strategy used:
+    "text" ($text on the movies_text index, ranked by textScore), "prefix"
+    (case-sensitive anchored regex on title_lower, served by title_lower_1) or "regex" (previous unanchored
+    $or over title, description and director).
+    """
+    query_filter = {}
+    projection = None
+    sort = None
+    strategy = None
+
+    if q:
+        q = q.strip()
+    if q:
+        if mode == "regex":
+            strategy = "regex"
+            query_filter["$or"] = [
+                {"title": {"$regex": q, "$options": "i"}},
+                {"description": {"$regex": q, "$options": "i"}},
+                {"director": {"$regex": q, "$options": "i"}}
+            ]
+        elif len(q) < MONGO_TEXT_MIN_LENGTH:
+            strategy = "prefix"
+            query_filter[TITLE_KEY_FIELD] = {"$regex": f"^{re.escape(title_key(q))}"}
+            sort = [(TITLE_KEY_FIELD, 1)]
+        else:
+            strategy = "text"
+            query_filter["$text"] = {"$search": q}
+            projection = {"score": {"$meta": "textScore"}}
+            sort = [("score", {"$meta": "textScore"}), ("avg_vote", -1)]
+
+    if title:
+        title_filter = {"$regex": title, "$options": "i"}
+        query_filter["title"] = title_filter
+
+    if director:
+        query_filter["director"] = {"$regex": director, "$options": "i"}
+
+    if country:
+        query_filter["country"] = {"$regex": country, "$options": "i"}
+
+    if min_year or max_year:
+        year_filter = {}
+        if min_year:
+            year_filter["$gte"] = min_year
+        if max_year:
+            year_filter["$lte"] = max_year
+        query_filter["year"] = year_filter
+
+    if min_rating:
+        query_filter["avg_vote"] = {"$gte": min_rating}
+
+    return {"filter": query_filter, "projection": projection, "sort": sort, "strategy": strategy}
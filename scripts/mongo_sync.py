@@ -0,0 +1,147 @@
+import os
+import sys
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import Float, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.mongo_search import title_key, TITLE_KEY_FIELD
+from scripts.mongo_load import load_documents_async, upsert_documents_async, MONGO_LOAD_MODE, MONGO_BATCH_SIZE
+
+# Rows fetched per round trip of the server-side cursor (one MongoDB write each)
+MONGO_SYNC_BATCH_SIZE = int(os.getenv("MONGO_SYNC_BATCH_SIZE", str(MONGO_BATCH_SIZE)))
+
+MOVIE_FIELDS = ["imdb_title_id", "title", "year", "duration", "description"]
+PRODUCTION_FIELDS = ["director", "writer", "production_company", "actors", "country", "language"]
+RATING_FIELDS = ["avg_vote", "votes", "reviews_from_users", "reviews_from_critics"]
+
+# etl_metadata key holding the updated_at lower bound of the next incremental sync
+SYNC_WATERMARK_KEY = "mongo_sync_watermark"
+
+SYNC_COLUMNS = dict(
+    imdb_title_id=String, title=String, year=Integer, duration=Integer, description=String,
+    production_id=String, director=JSONB, writer=JSONB, production_company=String,
+    actors=JSONB, country=JSONB, language=JSONB,
+    rating_id=String, avg_vote=Float, votes=Integer, reviews_from_users=Integer, reviews_from_critics=Integer
+)
+
+SYNC_SELECT = """
+    SELECT m.imdb_title_id, m.title, m.year, m.duration, m.description,
+           p.imdb_title_id AS production_id,
+           p.director, p.writer, p.production_company, p.actors, p.country, p.language,
+           r.imdb_title_id AS rating_id,
+           r.avg_vote, r.votes, r.reviews_from_users, r.reviews_from_critics
+    FROM movie_info m
+    LEFT JOIN production_info p ON m.imdb_title_id = p.imdb_title_id
+    LEFT JOIN rating_info r ON m.imdb_title_id = r.imdb_title_id
+"""
+
+# One joined pass over the three tables; typed so JSONB values arrive decoded
+SYNC_QUERY = text(SYNC_SELECT).columns(**SYNC_COLUMNS)
+
+# Same rows, restricted to titles with a row stamped at or after :since in any of
+# the three tables (each branch is a range scan on its updated_at index)
+CHANGED_QUERY = text(f"""
+    WITH changed AS (
+        SELECT imdb_title_id FROM movie_info WHERE updated_at >= :since
+        UNION
+        SELECT imdb_title_id FROM production_info WHERE updated_at >= :since
+        UNION
+        SELECT imdb_title_id FROM rating_info WHERE updated_at >= :since
+    )
+    {SYNC_SELECT}
+    JOIN changed c ON c.imdb_title_id = m.imdb_title_id
+""").columns(**SYNC_COLUMNS)
+
+# Start of the oldest transaction open in this database: anything it or a later
+# transaction commits is stamped at or after it (updated_at is the transaction time)
+NEXT_WATERMARK_QUERY = text("""
+    SELECT timezone('utc', COALESCE(MIN(xact_start), now()))
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND xact_start IS NOT NULL
+""")
+
+def movie_document(row) -> dict:
+    """MongoDB document of one joined row; production and rating fields only when those rows exist."""
+    document = {field: row[field] for field in MOVIE_FIELDS}
+    document[TITLE_KEY_FIELD] = title_key(row["title"])
+    if row["production_id"] is not None:
+        document.update({field: row[field] for field in PRODUCTION_FIELDS})
+    if row["rating_id"] is not None:
+        document.update({field: row[field] for field in RATING_FIELDS})
+    return document
+
+async def stream_movie_documents(
+    bind,
+    batch_size: int = MONGO_SYNC_BATCH_SIZE,
+    since: Optional[datetime] = None
+) -> AsyncIterator[List[dict]]:
+    """
+    Stream the joined movies as batches of documents from a server-side cursor
+    on the async engine; only titles changed since `since` when given.
+    """
+    query = SYNC_QUERY if since is None else CHANGED_QUERY.bindparams(since=since)
+    async with bind.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions(batch_size):
+            yield [movie_document(row) for row in partition]
+
+async def read_sync_watermark(bind) -> Optional[datetime]:
+    """updated_at lower bound stored by the last successful sync (None before the first one)."""
+    async with bind.connect() as connection:
+        value = (await connection.execute(
+            text("SELECT value FROM etl_metadata WHERE key = :key"), {"key": SYNC_WATERMARK_KEY}
+        )).scalar()
+    return datetime.fromisoformat(value) if value else None
+
+async def next_sync_watermark(bind) -> datetime:
+    async with bind.connect() as connection:
+        return (await connection.execute(NEXT_WATERMARK_QUERY)).scalar()
+
+async def store_sync_watermark(bind, watermark: datetime) -> None:
+    async with bind.begin() as connection:
+        await connection.execute(
+            text("""
+                INSERT INTO etl_metadata (key, value, updated_at)
+                VALUES (:key, :value, timezone('utc', now()))
+                ON CONFLICT (key) DO UPDATE
+                SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+            """),
+            {"key": SYNC_WATERMARK_KEY, "value": watermark.isoformat()}
+        )
+
+async def sync_postgres_to_mongo_async(
+    mongo_db,
+    bind,
+    mode: str = MONGO_LOAD_MODE,
+    batch_size: int = MONGO_SYNC_BATCH_SIZE,
+    incremental: bool = False
+) -> dict:
+    """
+    Copy the movies from PostgreSQL to MongoDB in constant memory.
+
+    Each batch read from the cursor is written with the given load mode while
+    the next one is being fetched. With incremental=True only the titles
+    stamped since the stored watermark are upserted (everything when there is
+    no watermark yet) and nothing is deleted. Every successful sync stores the
+    watermark of the next one. Returns the load_documents_async counts plus
+    the "since" and "watermark" bounds.
+    """
+    if incremental and mode != "upsert":
+        raise ValueError("Incremental sync only supports the upsert mode")
+
+    since = await read_sync_watermark(bind) if incremental else None
+    # Taken before reading so rows committed while the sync runs are shipped next time
+    watermark = await next_sync_watermark(bind)
+
+    documents = stream_movie_documents(bind, batch_size, since)
+    if since is not None:
+        result = await upsert_documents_async(mongo_db["movies"], documents, delete_missing=False)
+    else:
+        result = await load_documents_async(mongo_db, documents, mode=mode)
+
+    await store_sync_watermark(bind, watermark)
+    result["since"] = since.isoformat() if since else None
+    result["watermark"] = watermark.isoformat()
+    return result
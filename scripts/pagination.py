@@ -0,0 +1,86 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Sort fields accepted by the keyset-paginated listings: field -> may be NULL/missing.
+# Each one has a (field, imdb_title_id) index so every page is an index seek
+PG_SORT_FIELDS = {"imdb_title_id": False, "title": False, "year": True, "duration": True}
+MONGO_SORT_FIELDS = {
+    "imdb_title_id": False, "title": True, "year": True, "avg_vote": True, "votes": True, "duration": True
+}
+
+def encode_cursor(sort_by: str, order: str, row: Dict[str, Any]) -> str:
+    """Opaque continuation token pointing just after `row`."""
+    payload = {"s": sort_by, "o": order, "v": row.get(sort_by), "id": row["imdb_title_id"]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(token: Optional[str], sort_by: str, order: str) -> Optional[Dict[str, Any]]:
+    """Decode a token from encode_cursor; it must belong to the same sort_by and order."""
+    if not token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        cursor = {"value": payload["v"], "id": payload["id"], "sort_by": payload["s"], "order": payload["o"]}
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (cursor["sort_by"], cursor["order"]) != (sort_by, order):
+        raise ValueError("Cursor was issued for another sort_by/order")
+    return cursor
+
+def check_sort(sort_by: str, order: str, allowed: Dict[str, bool]) -> None:
+    if sort_by not in allowed:
+        raise ValueError(f"sort_by must be one of: {', '.join(allowed)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+
+def keyset_phases(sort_by: str, nullable: bool, cursor: Optional[Dict[str, Any]]) -> List[Tuple[bool, Optional[tuple]]]:
+    """
+    Pages are ordered by (sort_by, imdb_title_id) with NULL sort values last.
+
+    Returns the scans still needed after `cursor` as (nulls, after) pairs:
+    rows with a value (after the (value, id) of the cursor), then, for
+    nullable fields, rows without one (after the id of the cursor).
+    """
+    if cursor is None:
+        return [(False, None)] + ([(True, None)] if nullable else [])
+    if cursor["value"] is None:
+        return [(True, (cursor["id"],))]
+    return [(False, (cursor["value"], cursor["id"]))] + ([(True, None)] if nullable else [])
+
+def mongo_phase_query(sort_by: str, order: str, nulls: bool, after: Optional[tuple]) -> Tuple[dict, list]:
+    """Filter and sort of one keyset scan over the movies collection."""
+    direction = -1 if order == "desc" else 1
+    op = "$lt" if order == "desc" else "$gt"
+    if sort_by == "imdb_title_id":
+        return ({"imdb_title_id": {op: after[-1]}} if after else {}), [("imdb_title_id", direction)]
+    if nulls:
+        query = {sort_by: None}
+        if after:
+            query["imdb_title_id"] = {op: after[-1]}
+        return query, [("imdb_title_id", direction)]
+    if after:
+        value, last_id = after
+        query = {"$or": [{sort_by: {op: value}}, {sort_by: value, "imdb_title_id": {op: last_id}}]}
+    else:
+        query = {sort_by: {"$ne": None}}
+    return query, [(sort_by, direction), ("imdb_title_id", direction)]
+
+async def mongo_page_async(collection, sort_by: str, order: str, limit: int, token: Optional[str] = None) -> dict:
+    """One keyset page of `collection`; costs the same at any depth."""
+    check_sort(sort_by, order, MONGO_SORT_FIELDS)
+    cursor = decode_cursor(token, sort_by, order)
+    documents = []
+    for nulls, after in keyset_phases(sort_by, MONGO_SORT_FIELDS[sort_by], cursor):
+        query, sort = mongo_phase_query(sort_by, order, nulls, after)
+        async for document in collection.find(query).sort(sort).limit(limit + 1 - len(documents)):
+            document["_id"] = str(document["_id"])
+            documents.append(document)
+        if len(documents) > limit:
+            break
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    return {
+        "data": documents,
+        "next_cursor": encode_cursor(sort_by, order, documents[-1]) if has_more else None
+    }
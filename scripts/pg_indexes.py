@@ -0,0 +1,59 @@
+import logging
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Trigram GIN indexes, created outside models.py because they need the pg_trgm
+# extension, which is not installed on every PostgreSQL server
+TRGM_INDEXES = {
+    # LOWER(title) LIKE '%...%', similarity() and word_similarity() in MovieService
+    "ix_movie_info_title_trgm": "CREATE INDEX IF NOT EXISTS ix_movie_info_title_trgm "
+                                "ON movie_info USING gin (LOWER(title) gin_trgm_ops)",
+}
+
+# None until checked; trigram search falls back to plain LIKE when False
+_trgm_enabled = None
+
+def ensure_trigram_indexes(bind) -> bool:
+    """Install pg_trgm and its GIN indexes when the server provides the extension."""
+    global _trgm_enabled
+    with bind.begin() as connection:
+        available = connection.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first() is not None
+        if not available:
+            logger.warning("pg_trgm is not available, title search will scan movie_info")
+            _trgm_enabled = False
+            return False
+
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for statement in TRGM_INDEXES.values():
+            connection.execute(text(statement))
+
+    _trgm_enabled = True
+    return True
+
+def trigram_enabled(db) -> bool:
+    """Whether pg_trgm is installed in the database behind `db` (checked once per process)."""
+    global _trgm_enabled
+    if _trgm_enabled is None:
+        _trgm_enabled = db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+    return _trgm_enabled
+
+def ensure_model_indexes(bind, model) -> None:
+    """Create the indexes declared on `model` that an existing table is missing (create_all skips them)."""
+    for index in model.__table__.indexes:
+        index.create(bind, checkfirst=True)
+
+def ensure_change_tracking(bind, model) -> None:
+    """Add the updated_at column of `model` to a table created before change tracking, plus its index."""
+    table = model.__table__.name
+    with bind.begin() as connection:
+        # now() is stable, so existing rows get the default without a table rewrite
+        connection.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL "
+            f"DEFAULT timezone('utc', now())"
+        ))
+    ensure_model_indexes(bind, model)
@@ -0,0 +1,197 @@
+import os
+import sys
+from typing import Dict, Iterable
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Duration categories of /api/ratings/duration-analysis: (sort_order, label, upper bound)
+DURATION_CATEGORIES = [
+    (1, "Short (<60 min)", 59),
+    (2, "Medium (60-90 min)", 90),
+    (3, "Standard (91-120 min)", 120),
+    (4, "Long (121-150 min)", 150),
+    (5, "Very Long (>150 min)", None),
+]
+
+# Rollup table -> (key columns, measure columns)
+ROLLUPS = {
+    "rollup_rating_bucket": (["rating10"], ["movie_count", "votes_sum", "user_reviews_sum", "critic_reviews_sum"]),
+    "rollup_year": (["year", "rating10"], ["movie_count", "votes_sum", "user_reviews_sum", "critic_reviews_sum"]),
+    "rollup_duration": (["sort_order", "duration_category"], ["movie_count", "rating10_sum", "votes_sum", "duration_sum"]),
+    "rollup_company_year": (
+        ["production_company", "year"],
+        ["movie_count", "rating10_sum", "rating_count", "votes_sum", "duration_sum", "duration_count"]
+    ),
+}
+
+# Columns of a movie that feed the rollups
+CONTRIBUTION_COLUMNS = [
+    "imdb_title_id", "year", "duration", "avg_vote", "votes",
+    "reviews_from_users", "reviews_from_critics", "production_company"
+]
+
+def snapshot_contributions(connection, ids: Iterable[str]) -> pd.DataFrame:
+    """Current rollup inputs of the movies in `ids` (taken before they are overwritten)."""
+    result = connection.execute(text("""
+        SELECT m.imdb_title_id, m.year, m.duration, r.avg_vote, r.votes,
+               r.reviews_from_users, r.reviews_from_critics, p.production_company
+        FROM movie_info m
+        LEFT JOIN rating_info r ON m.imdb_title_id = r.imdb_title_id
+        LEFT JOIN production_info p ON m.imdb_title_id = p.imdb_title_id
+        WHERE m.imdb_title_id = ANY(:ids)
+    """), {"ids": list(ids)})
+    return pd.DataFrame(result.fetchall(), columns=CONTRIBUTION_COLUMNS)
+
+def _signed_measures(frame: pd.DataFrame, sign: int) -> pd.DataFrame:
+    """Derive rollup keys and signed measures for every movie of `frame`."""
+    frame = frame[CONTRIBUTION_COLUMNS]
+    rated = frame["avg_vote"].notna()
+    duration = pd.to_numeric(frame["duration"], errors="coerce")
+    bounds = [duration <= upper for _, _, upper in DURATION_CATEGORIES[:-1]]
+
+    out = pd.DataFrame({
+        "year": pd.to_numeric(frame["year"], errors="coerce"),
+        "rating10": (pd.to_numeric(frame["avg_vote"], errors="coerce") * 10).round(),
+        "sort_order": np.select(bounds, [order for order, _, _ in DURATION_CATEGORIES[:-1]], DURATION_CATEGORIES[-1][0]),
+        "production_company": frame["production_company"],
+        "rated": rated,
+        "has_duration": duration.notna(),
+    }, index=frame.index)
+    out["duration_category"] = out["sort_order"].map({order: label for order, label, _ in DURATION_CATEGORIES})
+
+    out["movie_count"] = sign
+    out["rating_count"] = sign * rated.astype(int)
+    out["rating10_sum"] = sign * out["rating10"].fillna(0)
+    out["votes_sum"] = sign * pd.to_numeric(frame["votes"], errors="coerce").fillna(0)
+    out["user_reviews_sum"] = sign * pd.to_numeric(frame["reviews_from_users"], errors="coerce").fillna(0)
+    out["critic_reviews_sum"] = sign * pd.to_numeric(frame["reviews_from_critics"], errors="coerce").fillna(0)
+    out["duration_sum"] = sign * duration.fillna(0)
+    out["duration_count"] = sign * out["has_duration"].astype(int)
+    return out
+
+def rollup_deltas(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Per-rollup changes caused by replacing the `old` rows with the `new` ones.
+
+    Old contributions are subtracted and new ones added, so an update that
+    moves a movie to another year or company shifts it between groups.
+    Only groups with a non-zero change are returned.
+    """
+    parts = [_signed_measures(new, 1)]
+    if not old.empty:
+        parts.append(_signed_measures(old, -1))
+    rows = pd.concat(parts, ignore_index=True)
+
+    company = rows["production_company"]
+    selections = {
+        # FROM rating_info WHERE avg_vote IS NOT NULL
+        "rollup_rating_bucket": rows["rated"],
+        # rating_info JOIN movie_info WHERE year IS NOT NULL
+        "rollup_year": rows["rated"] & rows["year"].notna(),
+        # rating_info JOIN movie_info WHERE duration IS NOT NULL
+        "rollup_duration": rows["rated"] & rows["has_duration"],
+        # production_info JOIN movie_info LEFT JOIN rating_info, named companies only
+        "rollup_company_year": company.notna() & ~company.isin(["", "Unknown"]),
+    }
+
+    deltas = {}
+    for table, (keys, measures) in ROLLUPS.items():
+        selected = rows[selections[table]].copy()
+        if table == "rollup_company_year":
+            selected["year"] = selected["year"].fillna(0)
+        if selected.empty:
+            continue
+        grouped = selected.groupby(keys, as_index=False)[measures].sum()
+        grouped = grouped[(grouped[measures] != 0).any(axis=1)]
+        if not grouped.empty:
+            numeric_keys = [key for key in keys if key not in ("production_company", "duration_category")]
+            deltas[table] = grouped.astype({column: "int64" for column in numeric_keys + measures})
+    return deltas
+
+def apply_rollup_deltas(connection, deltas: Dict[str, pd.DataFrame]) -> int:
+    """Add the deltas to the rollup tables on `connection` (inside the load transaction)."""
+    applied = 0
+    for table, frame in deltas.items():
+        keys, measures = ROLLUPS[table]
+        columns = keys + measures
+        # duration_category is descriptive, sort_order alone identifies the group
+        conflict = [key for key in keys if key != "duration_category"]
+        updates = ", ".join(f"{column} = {table}.{column} + EXCLUDED.{column}" for column in measures)
+        connection.execute(text(f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join(f":{column}" for column in columns)})
+            ON CONFLICT ({", ".join(conflict)}) DO UPDATE SET {updates}
+        """), frame.to_dict(orient="records"))
+        applied += len(frame)
+    return applied
+
+_DURATION_CASE = "CASE " + " ".join(
+    f"WHEN m.duration <= {upper} THEN {order}" for order, _, upper in DURATION_CATEGORIES[:-1]
+) + f" ELSE {DURATION_CATEGORIES[-1][0]} END"
+
+_DURATION_LABEL = "CASE " + " ".join(
+    f"WHEN m.duration <= {upper} THEN '{label}'" for _, label, upper in DURATION_CATEGORIES[:-1]
+) + f" ELSE '{DURATION_CATEGORIES[-1][1]}' END"
+
+def rebuild_rollups(connection) -> None:
+    """Recompute every rollup from the base tables (backfill or after a failed load)."""
+    for table in ROLLUPS:
+        connection.execute(text(f"DELETE FROM {table}"))
+
+    connection.execute(text("""
+        INSERT INTO rollup_rating_bucket (rating10, movie_count, votes_sum, user_reviews_sum, critic_reviews_sum)
+        SELECT ROUND(avg_vote * 10)::int, COUNT(*), SUM(votes), SUM(reviews_from_users), SUM(reviews_from_critics)
+        FROM rating_info
+        WHERE avg_vote IS NOT NULL
+        GROUP BY 1
+    """))
+    connection.execute(text("""
+        INSERT INTO rollup_year (year, rating10, movie_count, votes_sum, user_reviews_sum, critic_reviews_sum)
+        SELECT m.year, ROUND(r.avg_vote * 10)::int, COUNT(*), SUM(r.votes),
+               SUM(r.reviews_from_users), SUM(r.reviews_from_critics)
+        FROM rating_info r
+        INNER JOIN movie_info m ON r.imdb_title_id = m.imdb_title_id
+        WHERE m.year IS NOT NULL
+        GROUP BY 1, 2
+    """))
+    connection.execute(text(f"""
+        INSERT INTO rollup_duration (sort_order, duration_category, movie_count, rating10_sum, votes_sum, duration_sum)
+        SELECT {_DURATION_CASE}, {_DURATION_LABEL}, COUNT(*), SUM(ROUND(r.avg_vote * 10)), SUM(r.votes), SUM(m.duration)
+        FROM rating_info r
+        INNER JOIN movie_info m ON r.imdb_title_id = m.imdb_title_id
+        WHERE m.duration IS NOT NULL
+        GROUP BY 1, 2
+    """))
+    connection.execute(text("""
+        INSERT INTO rollup_company_year (production_company, year, movie_count, rating10_sum, rating_count,
+                                         votes_sum, duration_sum, duration_count)
+        SELECT p.production_company, COALESCE(m.year, 0), COUNT(*),
+               COALESCE(SUM(ROUND(r.avg_vote * 10)), 0), COUNT(r.avg_vote),
+               COALESCE(SUM(r.votes), 0), COALESCE(SUM(m.duration), 0), COUNT(m.duration)
+        FROM production_info p
+        INNER JOIN movie_info m ON p.imdb_title_id = m.imdb_title_id
+        LEFT JOIN rating_info r ON p.imdb_title_id = r.imdb_title_id
+        WHERE p.production_company IS NOT NULL
+            AND p.production_company != 'Unknown'
+            AND p.production_company != ''
+        GROUP BY 1, 2
+    """))
+
+def ensure_rollups(bind) -> bool:
+    """Backfill the rollups once for data loaded before they existed."""
+    with bind.begin() as connection:
+        missing = connection.execute(text("""
+            SELECT EXISTS (SELECT 1 FROM rating_info)
+                AND NOT EXISTS (SELECT 1 FROM rollup_rating_bucket)
+        """)).scalar()
+        if missing:
+            rebuild_rollups(connection)
+    return bool(missing)
+
+if __name__ == "__main__":
+    from database import engine
+    with engine.begin() as connection:
+        rebuild_rollups(connection)
+    print("Rollups rebuilt")
@@ -0,0 +1,34 @@
+import functools
+from sqlalchemy.ext.asyncio import AsyncSession
+
+class AsyncService:
+    """
+    Base of the async service variants: each public method runs the sync
+    service method through AsyncSession.run_sync, so the SQL, the row
+    formatting and the result cache are shared while the database I/O is
+    awaited on the asyncpg connection instead of holding a threadpool thread.
+    """
+    service_class = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(self.service_class(session), method)(*args, **kwargs)
+        )
+
+def _async_method(name: str, method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._run(name, *args, **kwargs)
+    return wrapper
+
+def async_variant(service_class) -> type:
+    """Build Async<Service> exposing every get_*/search_* method of `service_class` as a coroutine."""
+    methods = {
+        name: _async_method(name, method)
+        for name, method in vars(service_class).items()
+        if name.startswith(("get_", "search_")) and callable(method)
+    }
+    return type(f"Async{service_class.__name__}", (AsyncService,), {"service_class": service_class, **methods})
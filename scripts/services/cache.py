@@ -0,0 +1,141 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+from sqlalchemy import text
+
+# In-process cache of service results, invalidated when the ETL bumps the data version
+SERVICE_CACHE_ENABLED = os.getenv("SERVICE_CACHE", "true").lower() == "true"
+SERVICE_CACHE_MAX_ENTRIES = int(os.getenv("SERVICE_CACHE_MAX_ENTRIES", "1024"))
+SERVICE_CACHE_TTL = float(os.getenv("SERVICE_CACHE_TTL", "3600"))
+# How often the data version is re-read from etl_metadata (other workers may run the ETL)
+SERVICE_CACHE_VERSION_CHECK = float(os.getenv("SERVICE_CACHE_VERSION_CHECK", "5"))
+
+DATA_VERSION_KEY = "data_version"
+
+def read_data_version(db) -> Tuple[int, Optional[datetime]]:
+    """Current data version and when it was set, from etl_metadata (0 before the first ETL run)."""
+    row = db.execute(
+        text("SELECT value, updated_at FROM etl_metadata WHERE key = :key"), {"key": DATA_VERSION_KEY}
+    ).first()
+    return (int(row.value), row.updated_at) if row is not None else (0, None)
+
+def bump_data_version(bind) -> int:
+    """Increment the data version once a load and its aggregates are committed."""
+    with bind.begin() as connection:
+        version = connection.execute(text("""
+            INSERT INTO etl_metadata (key, value, updated_at)
+            VALUES (:key, '1', timezone('utc', now()))
+            ON CONFLICT (key) DO UPDATE
+            SET value = (etl_metadata.value::bigint + 1)::text, updated_at = EXCLUDED.updated_at
+            RETURNING value, updated_at
+        """), {"key": DATA_VERSION_KEY}).first()
+    service_cache.set_version(int(version.value), version.updated_at)
+    return int(version.value)
+
+class ServiceCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL, cleared whenever the data version changes.
+
+    Cached results are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = SERVICE_CACHE_MAX_ENTRIES, ttl: float = SERVICE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_updated_at = None
+        self._version_checked_at = 0.0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "stale_puts": 0}
+
+    @property
+    def version(self) -> Tuple[Optional[int], Optional[datetime]]:
+        """Last data version seen and its etl_metadata timestamp (UTC)."""
+        return self._version, self._version_updated_at
+
+    def set_version(self, version: int, updated_at: Optional[datetime] = None) -> None:
+        """Adopt `version`, dropping every entry computed for another one."""
+        with self._lock:
+            self._version_checked_at = time.monotonic()
+            self._version_updated_at = updated_at
+            if version != self._version:
+                if self._version is not None:
+                    self._stats["invalidations"] += 1
+                self._entries.clear()
+                self._version = version
+
+    def version_stale(self) -> bool:
+        """Whether the data version is older than SERVICE_CACHE_VERSION_CHECK seconds."""
+        return self._version is None or time.monotonic() - self._version_checked_at >= SERVICE_CACHE_VERSION_CHECK
+
+    def sync_version(self, db) -> None:
+        """Re-read the data version at most every SERVICE_CACHE_VERSION_CHECK seconds."""
+        if self.version_stale():
+            self.set_version(*read_data_version(db))
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        """Store `value`; when `version` is given, only if it is still the current data version."""
+        with self._lock:
+            if version is not None and version != self._version:
+                self._stats["stale_puts"] += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": SERVICE_CACHE_ENABLED,
+                "data_version": self._version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None
+            }
+
+service_cache = ServiceCache()
+
+def cached(method):
+    """Cache a service method by class, method name and arguments (services expose `self.db`)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not SERVICE_CACHE_ENABLED:
+            return method(self, *args, **kwargs)
+        service_cache.sync_version(self.db)
+        # Read before the query: a result computed while the ETL bumps the version
+        # is keyed (and refused by put) under the version it was computed for
+        version = service_cache.version[0]
+        key = (version, type(self).__name__, method.__name__, args, tuple(sorted(kwargs.items())))
+        hit, value = service_cache.get(key)
+        if hit:
+            return value
+        value = method(self, *args, **kwargs)
+        service_cache.put(key, value, version)
+        return value
+    return wrapper
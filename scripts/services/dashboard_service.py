@@ -0,0 +1,73 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+from database import AsyncSessionLocal
+from scripts.services.production_service import AsyncProductionService
+from scripts.services.rating_service import AsyncRatingService
+
+# Charts run at the same time, each on its own pooled connection
+# (keep below ASYNC_POOL_SIZE + ASYNC_MAX_OVERFLOW)
+DASHBOARD_MAX_WORKERS = int(os.getenv("DASHBOARD_MAX_WORKERS", "8"))
+
+# Chart name -> (service class, method, keyword arguments taken from the bundle filters)
+DASHBOARD_CHARTS = {
+    "statistics": (AsyncRatingService, "get_rating_statistics", lambda f: {}),
+    "companies": (AsyncProductionService, "get_top_production_companies", lambda f: {
+        "limit": f["company_limit"], "min_movies": f["company_min_movies"]
+    }),
+    "distribution": (AsyncRatingService, "get_rating_distribution", lambda f: {"bins": f["distribution_bins"]}),
+    "countries": (AsyncProductionService, "get_movies_by_country", lambda f: {
+        "top_n": f["country_top"], "year_from": f["year_from"], "year_to": f["year_to"]
+    }),
+    "trends": (AsyncRatingService, "get_rating_trends_by_year", lambda f: {
+        "start_year": f["trend_start"], "end_year": f["trend_end"]
+    }),
+    "languages": (AsyncProductionService, "get_language_distribution", lambda f: {"limit": f["language_limit"]}),
+    "directors": (AsyncProductionService, "get_top_directors", lambda f: {
+        "limit": f["director_limit"], "min_movies": f["director_min_movies"], "sort_by": f["director_sort"]
+    }),
+    "duration": (AsyncRatingService, "get_rating_vs_duration_analysis", lambda f: {}),
+    "top_rated": (AsyncRatingService, "get_top_rated_movies", lambda f: {
+        "limit": f["top_limit"], "min_votes": f["min_votes"]
+    }),
+}
+
+class DashboardService:
+    def __init__(self, session_factory: Callable = AsyncSessionLocal, max_workers: int = DASHBOARD_MAX_WORKERS):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+
+    async def _run_chart(self, chart: str, filters: Dict[str, Any], slots: asyncio.Semaphore) -> Any:
+        service_class, method, arguments = DASHBOARD_CHARTS[chart]
+        async with slots, self.session_factory() as db:
+            return await getattr(service_class(db), method)(**arguments(filters))
+
+    async def get_bundle(self, charts: Optional[List[str]], filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the service query of every chart concurrently and return them together.
+
+        A failing chart is reported under "errors" without discarding the others.
+        """
+        charts = list(dict.fromkeys(charts or DASHBOARD_CHARTS))
+        unknown = [chart for chart in charts if chart not in DASHBOARD_CHARTS]
+        if unknown:
+            raise ValueError(f"Unknown charts: {', '.join(unknown)}")
+
+        start = time.time()
+        slots = asyncio.Semaphore(self.max_workers)
+        outcomes = await asyncio.gather(
+            *(self._run_chart(chart, filters, slots) for chart in charts), return_exceptions=True
+        )
+        results, errors = {}, {}
+        for chart, outcome in zip(charts, outcomes):
+            if isinstance(outcome, Exception):
+                errors[chart] = str(outcome)
+            else:
+                results[chart] = outcome
+
+        return {
+            "charts": results,
+            "errors": errors,
+            "execution_time": round(time.time() - start, 4)
+        }
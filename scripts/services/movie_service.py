@@ -1,15 +1,43 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from scripts.services.cache import cached
+from scripts.services.async_service import async_variant
+from scripts.pg_indexes import trigram_enabled
+from scripts.pagination import PG_SORT_FIELDS, check_sort, decode_cursor, encode_cursor, keyset_phases
 import json
 
+# Filtro -> columna JSONB de production_info; `@>` usa los índices GIN jsonb_path_ops
+CONTAINMENT_FILTERS = {"actor": "actors", "director": "director", "country": "country", "language": "language"}
+
+def containment_conditions(filters: Dict[str, Optional[str]], params: Dict[str, Any]) -> List[str]:
+    """Condiciones `p.<columna> @> '["nombre"]'` para los filtros con valor (nombre exacto)"""
+    conditions = []
+    for name, column in CONTAINMENT_FILTERS.items():
+        if filters.get(name):
+            conditions.append(f"p.{column} @> CAST(:{name} AS jsonb)")
+            params[name] = json.dumps([filters[name].strip()])
+    return conditions
+
 class MovieService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_top_movies_by_rating(self, limit: int = 10) -> List[Dict[str, Any]]:
+    @cached
+    def get_top_movies_by_rating(
+        self,
+        limit: int = 10,
+        actor: Optional[str] = None,
+        director: Optional[str] = None,
+        country: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Obtiene las películas mejor calificadas con información completa"""
-        query = text("""
+        params = {"limit": limit}
+        conditions = ["r.avg_vote IS NOT NULL"] + containment_conditions(
+            {"actor": actor, "director": director, "country": country, "language": language}, params
+        )
+        query = text(f"""
             SELECT 
                 m.imdb_title_id,
                 m.title,
@@ -25,12 +53,12 @@ class MovieService:
             FROM movie_info m
             JOIN rating_info r ON m.imdb_title_id = r.imdb_title_id
             JOIN production_info p ON m.imdb_title_id = p.imdb_title_id
-            WHERE r.avg_vote IS NOT NULL
+            WHERE {" AND ".join(conditions)}
             ORDER BY r.avg_vote DESC, r.votes DESC
             LIMIT :limit
         """)
         
-        result = self.db.execute(query, {"limit": limit})
+        result = self.db.execute(query, params)
         movies = []
         
         for row in result:
@@ -43,13 +71,14 @@ class MovieService:
                 "avg_vote": float(row[5]) if row[5] else 0,
                 "votes": row[6],
                 "reviews_from_users": row[7],
-                "director": json.loads(row[8]) if row[8] else [],
-                "actors": json.loads(row[9]) if row[9] else [],
+                "director": row[8] or [],
+                "actors": row[9] or [],
                 "production_company": row[10]
             })
         
         return movies
     
+    @cached
     def get_movies_by_year_range(self, start_year: int, end_year: int) -> List[Dict[str, Any]]:
         """Obtiene películas dentro de un rango de años"""
         query = text("""
@@ -81,6 +110,7 @@ class MovieService:
             for row in result
         ]
     
+    @cached
     def get_movie_statistics(self) -> Dict[str, Any]:
         """Obtiene estadísticas generales de la base de datos"""
         stats_query = text("""
@@ -106,7 +136,7 @@ class MovieService:
                 AVG(r.avg_vote) as avg_rating
             FROM production_info p
             JOIN rating_info r ON p.imdb_title_id = r.imdb_title_id
-            WHERE p.director IS NOT NULL AND p.director != '"Unknown"'
+            WHERE p.director IS NOT NULL AND p.director <> '["Unknown"]'::jsonb
             GROUP BY p.director
             ORDER BY movie_count DESC
             LIMIT 5
@@ -125,7 +155,7 @@ class MovieService:
             "newest_year": result[7],
             "top_directors": [
                 {
-                    "director": json.loads(director[0]) if director[0] else "Unknown",
+                    "director": ", ".join(director[0]) if director[0] else "Unknown",
                     "movie_count": director[1],
                     "avg_rating": round(float(director[2]), 2) if director[2] else 0
                 }
@@ -133,18 +163,36 @@ class MovieService:
             ]
         }
     
+    @cached
     def search_movies_advanced(self, 
                               title: str = None,
                               min_year: int = None,
                               max_year: int = None,
-                              min_rating: float = None) -> List[Dict[str, Any]]:
+                              min_rating: float = None,
+                              fuzzy: bool = False,
+                              actor: str = None,
+                              director: str = None,
+                              country: str = None,
+                              language: str = None) -> List[Dict[str, Any]]:
         """Búsqueda avanzada de películas con múltiples filtros"""
         conditions = []
         params = {}
+        order_by = "r.avg_vote DESC NULLS LAST"
         
         if title:
-            conditions.append("LOWER(m.title) LIKE LOWER(:title)")
             params["title"] = f"%{title}%"
+            params["title_query"] = title.lower()
+            if trigram_enabled(self.db):
+                # Ambos operadores usan el índice GIN ix_movie_info_title_trgm
+                if fuzzy:
+                    # Tolerante a errores: "matrx" encuentra "The Matrix"
+                    conditions.append("LOWER(:title_query) <% LOWER(m.title)")
+                    order_by = "word_similarity(LOWER(:title_query), LOWER(m.title)) DESC, " + order_by
+                else:
+                    conditions.append("LOWER(m.title) LIKE LOWER(:title)")
+                    order_by = "similarity(LOWER(m.title), LOWER(:title_query)) DESC, " + order_by
+            else:
+                conditions.append("LOWER(m.title) LIKE LOWER(:title)")
         
         if min_year:
             conditions.append("m.year >= :min_year")
@@ -158,6 +206,10 @@ class MovieService:
             conditions.append("r.avg_vote >= :min_rating")
             params["min_rating"] = min_rating
         
+        conditions.extend(containment_conditions(
+            {"actor": actor, "director": director, "country": country, "language": language}, params
+        ))
+        
         where_clause = " AND ".join(conditions) if conditions else "1=1"
         
         query = text(f"""
@@ -175,7 +227,7 @@ class MovieService:
             LEFT JOIN rating_info r ON m.imdb_title_id = r.imdb_title_id
             LEFT JOIN production_info p ON m.imdb_title_id = p.imdb_title_id
             WHERE {where_clause}
-            ORDER BY r.avg_vote DESC NULLS LAST
+            ORDER BY {order_by}
             LIMIT 50
         """)
         
@@ -190,8 +242,64 @@ class MovieService:
                 "description": row[4],
                 "avg_vote": float(row[5]) if row[5] else None,
                 "votes": row[6],
-                "director": json.loads(row[7]) if row[7] else None,
+                "director": ", ".join(row[7]) if row[7] else None,
                 "production_company": row[8]
             }
             for row in result
-        ]
\ No newline at end of file
+        ]
+    
+    @cached
+    def get_movie_count(self) -> int:
+        """Total de películas (se calcula una vez por versión de datos)"""
+        return self.db.execute(text("SELECT COUNT(*) FROM movie_info")).scalar()
+    
+    @cached
+    def get_movies_page(
+        self,
+        sort_by: str = "imdb_title_id",
+        order: str = "asc",
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Página de movie_info por keyset sobre (sort_by, imdb_title_id); el costo no depende de la profundidad"""
+        check_sort(sort_by, order, PG_SORT_FIELDS)
+        position = decode_cursor(cursor, sort_by, order)
+        direction = "DESC" if order == "desc" else "ASC"
+        op = "<" if order == "desc" else ">"
+        
+        movies = []
+        for nulls, after in keyset_phases(sort_by, PG_SORT_FIELDS[sort_by], position):
+            params = {"limit": limit + 1 - len(movies)}
+            if sort_by == "imdb_title_id" or nulls:
+                conditions = [f"{sort_by} IS NULL"] if nulls else []
+                if after:
+                    conditions.append(f"imdb_title_id {op} :last_id")
+                    params["last_id"] = after[-1]
+                order_by = f"imdb_title_id {direction}"
+            else:
+                conditions = [f"{sort_by} IS NOT NULL"]
+                if after:
+                    conditions.append(f"({sort_by}, imdb_title_id) {op} (:value, :last_id)")
+                    params.update({"value": after[0], "last_id": after[1]})
+                order_by = f"{sort_by} {direction}, imdb_title_id {direction}"
+            
+            query = text(f"""
+                SELECT imdb_title_id, title, year, duration, description
+                FROM movie_info
+                {"WHERE " + " AND ".join(conditions) if conditions else ""}
+                ORDER BY {order_by}
+                LIMIT :limit
+            """)
+            movies.extend(dict(row) for row in self.db.execute(query, params).mappings())
+            if len(movies) > limit:
+                break
+        
+        has_more = len(movies) > limit
+        movies = movies[:limit]
+        return {
+            "data": movies,
+            "next_cursor": encode_cursor(sort_by, order, movies[-1]) if has_more else None
+        }
+
+# Coroutine methods over an AsyncSession (see scripts/services/async_service.py)
+AsyncMovieService = async_variant(MovieService)
\ No newline at end of file
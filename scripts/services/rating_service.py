@@ -2,26 +2,29 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text, func, desc, and_
 from models import Rating_Info, Movie_Info, Production_Info
 from typing import List, Dict, Any, Optional
+from scripts.services.cache import cached
+from scripts.services.async_service import async_variant
 
 class RatingService:
     def __init__(self, db: Session):
         self.db = db
     
+    @cached
     def get_rating_distribution(
         self,
         bins: int = 10
     ) -> List[Dict[str, Any]]:
         query = text("""
             SELECT 
-                FLOOR(avg_vote) as rating_floor,
-                COUNT(*) as movie_count,
-                AVG(votes) as avg_votes,
-                SUM(votes) as total_votes,
-                AVG(reviews_from_users) as avg_user_reviews,
-                AVG(reviews_from_critics) as avg_critic_reviews
-            FROM rating_info
-            WHERE avg_vote IS NOT NULL
-            GROUP BY FLOOR(avg_vote)
+                rating10 / 10 as rating_floor,
+                SUM(movie_count)::bigint as movie_count,
+                SUM(votes_sum)::float / SUM(movie_count) as avg_votes,
+                SUM(votes_sum)::bigint as total_votes,
+                SUM(user_reviews_sum)::float / SUM(movie_count) as avg_user_reviews,
+                SUM(critic_reviews_sum)::float / SUM(movie_count) as avg_critic_reviews
+            FROM rollup_rating_bucket
+            WHERE movie_count > 0
+            GROUP BY rating10 / 10
             ORDER BY rating_floor
         """)
         
@@ -39,6 +42,7 @@ class RatingService:
             for row in result
         ]
     
+    @cached
     def get_top_rated_movies(
         self,
         limit: int = 20,
@@ -80,13 +84,14 @@ class RatingService:
                 "votes": row["votes"],
                 "reviews_from_users": row["reviews_from_users"],
                 "reviews_from_critics": row["reviews_from_critics"],
-                "director": str(row["director"]).strip('"[]') if row["director"] else None,
+                "director": ", ".join(row["director"]) if row["director"] else None,
                 "production_company": row["production_company"],
                 "weighted_score": round(float(row["weighted_score"]), 2) if row["weighted_score"] else None
             }
             for row in result
         ]
     
+    @cached
     def get_most_voted_movies(
         self,
         limit: int = 20
@@ -123,6 +128,7 @@ class RatingService:
             for row in result
         ]
     
+    @cached
     def get_rating_trends_by_year(
         self,
         start_year: Optional[int] = None,
@@ -132,28 +138,31 @@ class RatingService:
         params = {}
         
         if start_year or end_year:
-            year_filter = "WHERE m.year BETWEEN :start_year AND :end_year"
+            year_filter = "AND year BETWEEN :start_year AND :end_year"
             params["start_year"] = start_year or 1900
             params["end_year"] = end_year or 2030
         
         query = text(f"""
             SELECT 
-                m.year,
-                COUNT(*) as movie_count,
-                AVG(r.avg_vote) as avg_rating,
-                AVG(r.votes) as avg_votes,
-                SUM(r.votes) as total_votes,
-                MAX(r.avg_vote) as best_rating,
-                MIN(r.avg_vote) as worst_rating,
-                STDDEV(r.avg_vote) as rating_std_dev,
-                AVG(r.reviews_from_users) as avg_user_reviews,
-                AVG(r.reviews_from_critics) as avg_critic_reviews
-            FROM rating_info r
-            INNER JOIN movie_info m ON r.imdb_title_id = m.imdb_title_id
-            {year_filter}
-            GROUP BY m.year
-            HAVING m.year IS NOT NULL
-            ORDER BY m.year DESC
+                year,
+                SUM(movie_count)::bigint as movie_count,
+                SUM(movie_count * rating10)::float / SUM(movie_count) / 10 as avg_rating,
+                SUM(votes_sum)::float / SUM(movie_count) as avg_votes,
+                SUM(votes_sum)::bigint as total_votes,
+                MAX(rating10) / 10.0 as best_rating,
+                MIN(rating10) / 10.0 as worst_rating,
+                SQRT(GREATEST(
+                    (SUM(movie_count * rating10 * rating10)::float
+                        - SUM(movie_count * rating10)::float ^ 2 / SUM(movie_count))
+                    / NULLIF(SUM(movie_count) - 1, 0),
+                    0
+                )) / 10 as rating_std_dev,
+                SUM(user_reviews_sum)::float / SUM(movie_count) as avg_user_reviews,
+                SUM(critic_reviews_sum)::float / SUM(movie_count) as avg_critic_reviews
+            FROM rollup_year
+            WHERE movie_count > 0 {year_filter}
+            GROUP BY year
+            ORDER BY year DESC
             LIMIT 50
         """)
         
@@ -175,6 +184,7 @@ class RatingService:
             for row in result
         ]
     
+    @cached
     def get_controversial_movies(
         self,
         limit: int = 20,
@@ -224,42 +234,17 @@ class RatingService:
             for row in result
         ]
     
+    @cached
     def get_rating_vs_duration_analysis(self) -> List[Dict[str, Any]]:
         query = text("""
-            WITH duration_categories AS (
-                SELECT 
-                    r.imdb_title_id,
-                    r.avg_vote,
-                    r.votes,
-                    m.duration,
-                    CASE 
-                        WHEN m.duration < 60 THEN 'Short (<60 min)'
-                        WHEN m.duration BETWEEN 60 AND 90 THEN 'Medium (60-90 min)'
-                        WHEN m.duration BETWEEN 91 AND 120 THEN 'Standard (91-120 min)'
-                        WHEN m.duration BETWEEN 121 AND 150 THEN 'Long (121-150 min)'
-                        WHEN m.duration > 150 THEN 'Very Long (>150 min)'
-                        ELSE 'Unknown'
-                    END as duration_category,
-                    CASE 
-                        WHEN m.duration < 60 THEN 1
-                        WHEN m.duration BETWEEN 60 AND 90 THEN 2
-                        WHEN m.duration BETWEEN 91 AND 120 THEN 3
-                        WHEN m.duration BETWEEN 121 AND 150 THEN 4
-                        WHEN m.duration > 150 THEN 5
-                        ELSE 6
-                    END as sort_order
-                FROM rating_info r
-                INNER JOIN movie_info m ON r.imdb_title_id = m.imdb_title_id
-                WHERE m.duration IS NOT NULL
-            )
             SELECT 
                 duration_category,
-                COUNT(*) as movie_count,
-                AVG(avg_vote) as avg_rating,
-                AVG(votes) as avg_votes,
-                AVG(duration) as avg_duration
-            FROM duration_categories
-            GROUP BY duration_category, sort_order
+                movie_count,
+                rating10_sum::float / movie_count / 10 as avg_rating,
+                votes_sum::float / movie_count as avg_votes,
+                duration_sum::float / movie_count as avg_duration
+            FROM rollup_duration
+            WHERE movie_count > 0
             ORDER BY sort_order
         """)
         
@@ -276,6 +261,7 @@ class RatingService:
             for row in result
         ]
     
+    @cached
     def get_underrated_movies(
         self,
         limit: int = 20,
@@ -320,33 +306,33 @@ class RatingService:
                 "votes": row["votes"],
                 "reviews_from_users": row["reviews_from_users"],
                 "reviews_from_critics": row["reviews_from_critics"],
-                "director": str(row["director"]).strip('"[]') if row["director"] else None,
-                "country": str(row["country"]).strip('"[]') if row["country"] else None
+                "director": ", ".join(row["director"]) if row["director"] else None,
+                "country": ", ".join(row["country"]) if row["country"] else None
             }
             for row in result
         ]
     
+    @cached
     def get_rating_statistics(self) -> Dict[str, Any]:
         query = text("""
             SELECT 
-                COUNT(*) as total_movies,
-                AVG(avg_vote) as overall_avg_rating,
-                MAX(avg_vote) as highest_rating,
-                MIN(avg_vote) as lowest_rating,
-                STDDEV(avg_vote) as rating_std_dev,
-                SUM(votes) as total_votes,
-                AVG(votes) as avg_votes_per_movie,
-                MAX(votes) as max_votes,
-                MIN(votes) as min_votes,
-                SUM(reviews_from_users) as total_user_reviews,
-                SUM(reviews_from_critics) as total_critic_reviews,
-                AVG(reviews_from_users) as avg_user_reviews,
-                AVG(reviews_from_critics) as avg_critic_reviews,
-                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY avg_vote) as median_rating,
-                PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY avg_vote) as q1_rating,
-                PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY avg_vote) as q3_rating
-            FROM rating_info
-            WHERE avg_vote IS NOT NULL
+                total_movies,
+                overall_avg_rating,
+                highest_rating,
+                lowest_rating,
+                rating_std_dev,
+                total_votes,
+                avg_votes_per_movie,
+                max_votes,
+                min_votes,
+                total_user_reviews,
+                total_critic_reviews,
+                avg_user_reviews,
+                avg_critic_reviews,
+                median_rating,
+                q1_rating,
+                q3_rating
+            FROM mv_rating_statistics
         """)
         
         result = self.db.execute(query).mappings().first()
@@ -370,4 +356,7 @@ class RatingService:
                 "q1_rating": round(float(result["q1_rating"]), 2) if result["q1_rating"] else None,
                 "q3_rating": round(float(result["q3_rating"]), 2) if result["q3_rating"] else None
             }
-        return {}
\ No newline at end of file
+        return {}
+
+# Coroutine methods over an AsyncSession (see scripts/services/async_service.py)
+AsyncRatingService = async_variant(RatingService)
\ No newline at end of file
@@ -1,9 +1,84 @@
 import pandas as pd
+import gzip
 import json
 import os
+from typing import Optional
 
-def transform_movies(df: pd.DataFrame) -> dict:
-    """Transform raw dataframe into multiple cleaned tables."""
+try:
+    import pyarrow  # noqa: F401  (enables Arrow-backed string kernels)
+    _STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    _STRING_DTYPE = str
+
+# Comma-separated fields stored as JSON arrays of names in the JSONB columns
+LIST_COLUMNS = ["language", "actors", "director", "writer", "country"]
+
+# What json.dumps(ensure_ascii=False) escapes besides quotes and backslashes.
+# Non-ASCII is kept as is: JSONB and COPY read UTF-8, no \uXXXX needed
+_CONTROL_CHARACTERS = r"[\x00-\x1f]"
+_CONTROL_ESCAPES = {chr(code): json.dumps(chr(code))[1:-1] for code in range(0x20)}
+
+def encode_json_strings(series: pd.Series) -> pd.Series:
+    """Vectorized equivalent of `series.apply(json.dumps, ensure_ascii=False)` for a column of strings."""
+    series = series.astype(_STRING_DTYPE)
+    encoded = '"' + series.str.replace("\\", "\\\\", regex=False).str.replace('"', '\\"', regex=False) + '"'
+
+    # Control characters are rare: only the rows holding them get the extra passes
+    has_controls = series.str.contains(_CONTROL_CHARACTERS, regex=True)
+    if has_controls.any():
+        escaped = encoded[has_controls]
+        for character, escape in _CONTROL_ESCAPES.items():
+            escaped = escaped.str.replace(character, escape, regex=False)
+        encoded[has_controls] = escaped
+    return encoded
+
+def encode_json_arrays(series: pd.Series) -> pd.Series:
+    """
+    Vectorized equivalent of
+    `series.apply(lambda v: json.dumps([name.strip(" ") for name in v.strip().split(",")], ensure_ascii=False))`.
+    """
+    encoded = encode_json_strings(series.astype(_STRING_DTYPE).str.strip())
+    # Escaping never produces commas, so splitting the encoded string is safe
+    return "[" + encoded.str.replace(r" *, *", '", "', regex=True) + "]"
+
+def decode_json_arrays(series: pd.Series) -> pd.Series:
+    """
+    Vectorized inverse of encode_json_arrays: JSON text of one array of
+    names per row to Python lists, without a json.loads call per row.
+    """
+    series = series.astype(_STRING_DTYPE)
+    names = series.str[2:-2]
+    escaped = names.str.contains("\\", regex=False)
+    if escaped.any():
+        # Mark escaped backslashes/quotes and separators with control characters
+        # (never raw in JSON text) whose own escapes do not occur in these rows
+        rows = names[escaped]
+        backslash, quote, separator = [
+            character for character, escape in _CONTROL_ESCAPES.items()
+            if not rows.str.contains(escape, regex=False).any()
+        ][:3]
+        rows = (
+            rows.str.replace("\\\\", backslash, regex=False)
+            .str.replace('\\"', quote, regex=False)
+            .str.replace('", "', separator, regex=False)
+        )
+        for character, escape in _CONTROL_ESCAPES.items():
+            rows = rows.str.replace(escape, character, regex=False)
+        names = names.str.replace('", "', separator, regex=False)
+        names[escaped] = rows.str.replace(quote, '"', regex=False).str.replace(backslash, "\\", regex=False)
+        return names.str.split(separator, regex=False)
+    return names.str.split('", "', regex=False)
+
+def transform_movies(
+    df: pd.DataFrame,
+    processed_path: str = "data/processed/processed.csv",
+    append: bool = False
+) -> dict:
+    """Transform raw dataframe into multiple cleaned tables.
+
+    With `append=True` the processed CSV is extended instead of overwritten,
+    so a stream of chunks produces the same file as a single full run.
+    """
 
     df = df.copy()
 
@@ -21,9 +96,9 @@ def transform_movies(df: pd.DataFrame) -> dict:
     df["production_company"] = df["production_company"].fillna("Unknown").astype(str)
     df["description"] = df["description"].fillna("No description given").astype(str)
 
-    # Convert list-like fields to JSON strings
-    for col in ["language", "actors", "director", "writer", "country"]:
-        df[col] = df[col].apply(json.dumps)
+    # Convert list-like fields to JSON arrays ("A, B" -> ["A", "B"])
+    for col in LIST_COLUMNS:
+        df[col] = encode_json_arrays(df[col])
 
     # Fix missing year with date_published
     df.loc[df["year"].isna() & df["date_published"].notna(), "year"] = df["date_published"].dt.year
@@ -41,8 +116,11 @@ def transform_movies(df: pd.DataFrame) -> dict:
     ].copy()
 
     # Save the DataFrame to a CSV file
-    os.makedirs(os.path.dirname("data/processed/"), exist_ok=True)
-    df.to_csv("data/processed/processed.csv", index=False)
+    os.makedirs(os.path.dirname(processed_path), exist_ok=True)
+    if append:
+        df.to_csv(processed_path, mode="a", header=not os.path.exists(processed_path), index=False)
+    else:
+        df.to_csv(processed_path, index=False)
 
     return {
         "full": df,
@@ -51,12 +129,33 @@ def transform_movies(df: pd.DataFrame) -> dict:
         "rating_info": rating_info,
     }
 
-def csv_to_json(csv_path: str, json_path: str):
-    df = pd.read_csv(csv_path, encoding="utf-8")
+def _open_text(path: str, mode: str):
+    """Open a text file, gzip-compressed when the path ends in .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8")
+
+def csv_to_json(csv_path: str, json_path: str, chunksize: Optional[int] = None):
     os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    df.to_json(json_path, orient="records", lines=True, force_ascii=False)
+    if chunksize is None:
+        df = pd.read_csv(csv_path, encoding="utf-8")
+        df.to_json(json_path, orient="records", lines=True, force_ascii=False)
+        return
 
-def json_to_csv(json_path: str, csv_path: str):
-    df = pd.read_json(json_path, lines=True)
+    # Stream chunk by chunk: JSON Lines can simply be concatenated
+    with _open_text(json_path, "w") as out:
+        for chunk in pd.read_csv(csv_path, encoding="utf-8", chunksize=chunksize):
+            lines = chunk.to_json(orient="records", lines=True, force_ascii=False)
+            out.write(lines if lines.endswith("\n") else lines + "\n")
+
+def json_to_csv(json_path: str, csv_path: str, chunksize: Optional[int] = None):
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-    df.to_csv(csv_path, index=False, encoding="utf-8")
\ No newline at end of file
+    if chunksize is None:
+        df = pd.read_json(json_path, lines=True)
+        df.to_csv(csv_path, index=False, encoding="utf-8")
+        return
+
+    with _open_text(csv_path, "w") as out:
+        with pd.read_json(json_path, lines=True, chunksize=chunksize) as reader:
+            for i, chunk in enumerate(reader):
+                chunk.to_csv(out, header=(i == 0), index=False)
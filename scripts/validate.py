@@ -1,6 +1,7 @@
 import pandas as pd
+from typing import Optional
 
-def validate_movies(df: pd.DataFrame):
+def validate_movies(df: pd.DataFrame, seen_ids: Optional[set] = None):
     errors = []
 
     # Example rules
@@ -13,4 +14,11 @@ def validate_movies(df: pd.DataFrame):
     if df["imdb_title_id"].duplicated().any():
         errors.append("Duplicate imdb_title_id detected")
 
+    # In streaming mode duplicates can span chunks, so ids from
+    # previous chunks are tracked by the caller
+    if seen_ids is not None:
+        if df["imdb_title_id"].isin(seen_ids).any():
+            errors.append("Duplicate imdb_title_id detected across chunks")
+        seen_ids.update(df["imdb_title_id"])
+
     return errors